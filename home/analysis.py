@@ -0,0 +1,112 @@
+import re
+import functools
+import nltk as nt
+
+def ensure_nltk_data(resource, package):
+    """Download data NLTK hanya jika belum ada (nt.download selalu menghubungi server)"""
+    try:
+        nt.data.find(resource)
+    except LookupError:
+        nt.download(package)
+
+class Analyzer:
+    """
+    Pipeline analisis teks yang dipakai bersama oleh indexing dan query
+    processing (lihat BSBIIndex.process_corp): lowercase, tokenisasi,
+    buang stopwords, lalu stemming dengan Porter Stemmer.
+
+    Tokenisasi default (fast_tokenizer=True) adalah satu regex yang sudah
+    di-compile. Karena semua karakter selain huruf/angka/underscore diganti
+    spasi sebelum word_tokenize, hasil word_tokenize sama dengan token \w+,
+    kecuali kontraksi yang dipecah oleh Treebank tokenizer (misalnya
+    "cannot" -> "can", "not"); kontraksi tersebut ditangani dengan tabel
+    CONTRACTIONS. Dengan fast_tokenizer=False, nt.word_tokenize yang
+    dipakai (membutuhkan data punkt).
+
+    Hasil stemming di-cache (LRU, dengan key bentuk permukaan token).
+    Frekuensi token mengikuti distribusi Zipf, sehingga sebagian besar
+    pemanggilan stem terlayani dari cache.
+
+    Parameters
+    ----------
+    stopwords: Iterable[str] atau None
+        Default-nya stopwords bahasa Inggris dari NLTK
+    stemmer: objek dengan method stem(str), default nt.stem.PorterStemmer()
+    stem_cache_size: int
+        Banyaknya entri maksimum cache stemming
+    fast_tokenizer: bool
+    """
+    TOKEN = re.compile(r"\w+")
+    WHITESPACE = re.compile(r"\s+")
+    NON_WORD = re.compile(r"[^\w\s]")
+    # Kontraksi yang dipecah oleh nt.word_tokenize walaupun tanpa tanda baca
+    CONTRACTIONS = {
+        "cannot": ("can", "not"),
+        "gimme": ("gim", "me"),
+        "gonna": ("gon", "na"),
+        "gotta": ("got", "ta"),
+        "lemme": ("lem", "me"),
+        "wanna": ("wan", "na"),
+    }
+
+    def __init__(self, stopwords = None, stemmer = None, stem_cache_size = 1 << 16, fast_tokenizer = True):
+        if stopwords is None:
+            ensure_nltk_data('corpora/stopwords', 'stopwords')
+            stopwords = nt.corpus.stopwords.words('english')
+        if not fast_tokenizer:
+            ensure_nltk_data('tokenizers/punkt', 'punkt')
+        self.stopwords = frozenset(stopwords)
+        self.stemmer = stemmer if stemmer is not None else nt.stem.PorterStemmer()
+        self.stem_cache_size = stem_cache_size
+        self.fast_tokenizer = fast_tokenizer
+        self.stem = functools.lru_cache(maxsize=stem_cache_size)(self.stemmer.stem)
+
+    def __getstate__(self):
+        # Cache (lru_cache) tidak bisa di-pickle, misalnya saat dikirim ke
+        # worker ProcessPoolExecutor; cache dibuat ulang di __setstate__
+        state = self.__dict__.copy()
+        del state['stem']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.stem = functools.lru_cache(maxsize=self.stem_cache_size)(self.stemmer.stem)
+
+    def tokenize(self, text):
+        """List of token (lowercase) dari text, stopwords belum dibuang"""
+        text = text.lower()
+        if not self.fast_tokenizer:
+            return nt.word_tokenize(self.NON_WORD.sub(" ", self.WHITESPACE.sub(" ", text)))
+        tokens = []
+        contractions = self.CONTRACTIONS
+        for token in self.TOKEN.findall(text):
+            parts = contractions.get(token)
+            if parts is None:
+                tokens.append(token)
+            else:
+                tokens.extend(parts)
+        return tokens
+
+    def analyze(self, text):
+        """List of term (hasil stemming) dari text, tanpa stopwords"""
+        stopwords, stem = self.stopwords, self.stem
+        return [stem(token) for token in self.tokenize(text) if token not in stopwords]
+
+    __call__ = analyze
+
+    def cache_info(self):
+        """Statistik cache stemming (hits, misses, maxsize, currsize)"""
+        return self.stem.cache_info()
+
+
+if __name__ == "__main__":
+
+    analyzer = Analyzer(stopwords = ["the", "of", "can", "not", "me"])
+    assert analyzer.tokenize("The Effects  of\tstatins; cannot-gimme") == \
+        ["the", "effects", "of", "statins", "can", "not", "gim", "me"], "tokenize salah"
+    assert analyzer.analyze("The effects of Statins, cannot running") == ["effect", "statin", "run"], "analyze salah"
+    assert analyzer.analyze("running runs running") == ["run", "run", "run"], "analyze salah"
+    assert analyzer.cache_info().hits > 0, "cache stemming tidak terpakai"
+
+    import pickle
+    assert pickle.loads(pickle.dumps(analyzer)).analyze("effects of statins") == ["effect", "statin"], "pickle salah"
@@ -1,20 +1,33 @@
 import os
 import pickle
 import contextlib
-import heapq
 import time
 import math
 import re
-
-from .index import InvertedIndexReader, InvertedIndexWriter
-from .util import IdMap, sorted_merge_posts_and_tfs
+import json
+import shutil
+import threading
+import uuid
+import numpy as np
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+from .index import InvertedIndexReader, InvertedIndexWriter, PostingsCursor
+from .segments import MultiSegmentReader
+from .stats import TermStatistics
+from .impact import ImpactIndex
+from .daat import TfIdfScoring, TfMaxNormScoring, BM25Scoring, wand_top_k
+from .util import IdMap
+from .deletions import DeletionBitmap
+from .docvectors import DocVectors
+from .docstore import DocumentStore
+from .analysis import Analyzer
+from .merge import merge_indices
+from .spimi import SpimiBuilder
 from .compression import StandardPostings, VBEPostings
 from Sastrawi.Stemmer.StemmerFactory import StemmerFactory
 from Sastrawi.StopWordRemover.StopWordRemoverFactory import StopWordRemoverFactory
 from tqdm import tqdm
-import nltk as nt
-nt.download('stopwords')
-nt.download('punkt')
 
 class BSBIIndex:
     """
@@ -24,50 +37,664 @@ class BSBIIndex:
     doc_id_map(IdMap): Untuk mapping relative paths dari dokumen (misal,
                     /collection/0/gamma.txt) to docIDs
     data_dir(str): Path ke data
-    output_dir(str): Path ke output index files
+    output_dir(str): Path ke output index files. Setiap index() menulis ke
+                    directory generation baru di dalam output_dir, lalu file
+                    manifest CURRENT diganti secara atomik (lihat
+                    publish_generation). Index lama tanpa CURRENT dibaca
+                    langsung dari output_dir.
     postings_encoding: Lihat di compression.py, kandidatnya adalah StandardPostings,
                     VBEPostings, dsb.
     index_name(str): Nama dari file yang berisi inverted index
+    block_size(int): Banyaknya posting per block pada main index (skip pointer
+                    dan block-max TF), lihat InvertedIndex.block_size
+    impact_ordered(bool): Jika True, index() juga membangun impact-ordered index
+                    untuk BM25 (lihat impact.ImpactIndex) bernama <index_name>_impact
+    store_documents(bool): Jika True, index() juga menyimpan teks semua dokumen
+                    di <index_name>.docs (lihat docstore.DocumentStore)
+    analyzer(Analyzer): Pipeline analisis teks untuk dokumen dan query (lihat
+                    analysis.Analyzer); default Analyzer()
+    keep_generations(int): Banyaknya directory generation terakhir yang
+                    dipertahankan di disk
+    memory_budget(int): Perkiraan bytes postings di memori saat indexing
+                    sebelum sebuah intermediate index ditulis (lihat
+                    spimi.SpimiBuilder)
+    index_dir(str): Directory generation yang sedang dipakai (dibaca oleh
+                    load() atau sedang ditulis oleh index())
+    generation(int): Nomor generation index_dir, None untuk layout lama
+    generation_id(str): Id acak generation tersebut (lihat publish_generation)
     """
-    def __init__(self, data_dir, output_dir, postings_encoding, index_name = "main_index"):
+    MANIFEST_NAME = 'CURRENT'
+    GENERATION_DIR = re.compile(r'^generation_(\d+)$')
+
+    def __init__(self, data_dir, output_dir, postings_encoding, index_name = "main_index", block_size = 128,
+                 impact_ordered = False, analyzer = None, keep_generations = 2, memory_budget = 64 << 20,
+                 store_documents = True):
         self.term_id_map = IdMap()
         self.doc_id_map = IdMap()
         self.data_dir = data_dir
         self.output_dir = output_dir
+        self.index_dir = output_dir
+        self.generation = None
+        self.generation_id = None
+        self.keep_generations = keep_generations
+        self.memory_budget = memory_budget
         self.index_name = index_name
         self.postings_encoding = postings_encoding
+        self.block_size = block_size
+        self.impact_ordered = impact_ordered
+        self.store_documents = store_documents
         self.doc_length = dict()
         self.avg_doc_length = -1
 
+        # Reader main index yang tetap terbuka selama instance ini hidup,
+        # diisi oleh load() dan ditutup oleh close()
+        self.reader = None
+        self.term_stats = None
+        self.impact_index = None
+        # docID dokumen yang dihapus atau di-update (lihat delete_documents)
+        self.deleted = DeletionBitmap()
+        # Banyaknya dokumen terhapus yang postings-nya sudah dibuang compact()
+        self.purged = 0
+        # Vektor LSI dokumen (lihat build_doc_vectors), None jika belum dibangun
+        self.doc_vectors = None
+        # Teks dokumen (lihat build_document_store), None jika belum dibangun
+        self.doc_store = None
+
         # Untuk menyimpan nama-nama file dari semua intermediate inverted index
         self.intermediate_indices = []
-        self.stemmer = nt.stem.PorterStemmer()
-        self.stopword = set(nt.corpus.stopwords.words('english'))
-        self.tokenizer = nt.tokenize
+        self.analyzer = analyzer if analyzer is not None else Analyzer()
+
+        # Melindungi daftar delta segment (lihat index_incremental dan compact)
+        self.segments_lock = threading.Lock()
+        self.compaction_lock = threading.Lock()
 
 
     def process_corp(self, corpus):
-        return [self.stemmer.stem(x) for x in [w for w in self.tokenizer.word_tokenize(re.sub("[^\w\s]", " ", re.sub("\s+", " ", corpus.lower()))) if not w.lower() in self.stopword]]
+        """List of term dari corpus (dokumen atau query), lihat analysis.Analyzer"""
+        return self.analyzer.analyze(corpus)
 
 
-    def save(self):
-        """Menyimpan doc_id_map and term_id_map ke output directory via pickle"""
+    def save(self, directory = None):
+        """
+        Menyimpan doc_id_map and term_id_map ke output directory dalam bentuk
+        compact (terms.idmap dan docs.idmap, lihat util.CompactStrings)
+        """
+        directory = directory or self.index_dir
+        self.term_id_map.save(os.path.join(directory, 'terms.idmap'))
+        self.doc_id_map.save(os.path.join(directory, 'docs.idmap'))
 
-        with open(os.path.join(self.output_dir, 'terms.dict'), 'wb') as f:
-            pickle.dump(self.term_id_map, f)
-        with open(os.path.join(self.output_dir, 'docs.dict'), 'wb') as f:
-            pickle.dump(self.doc_id_map, f)
+    def load_id_map(self, name):
+        """
+        Memuat IdMap name (terms atau docs) dari output directory. Index lama
+        yang belum mempunyai <name>.idmap dibaca dari <name>.dict via pickle.
+        """
+        path = os.path.join(self.index_dir, name + '.idmap')
+        if os.path.exists(path):
+            return IdMap.load(path)
+        with open(os.path.join(self.index_dir, name + '.dict'), 'rb') as f:
+            return pickle.load(f)
 
     def load(self):
-        """Memuat doc_id_map and term_id_map dari output directory"""
+        """
+        Memuat doc_id_map, term_id_map, dan membuka reader main index dari
+        output directory. Hasilnya tetap resident di memori, sehingga
+        pemanggilan berikutnya tidak melakukan unpickle ulang. Gunakan
+        reload() jika index di disk sudah dibangun ulang.
+        """
+        if self.reader is not None:
+            return
+
+        self.resolve_generation()
+        self.term_id_map = self.load_id_map('terms')
+        self.doc_id_map = self.load_id_map('docs')
+        self.deleted = DeletionBitmap(self.deleted_path())
+        # Jika ada delta segment (lihat index_incremental), main index dan
+        # semua delta dibaca bersama
+        segments = self.read_segments()
+        deltas = segments['deltas']
+        self.purged = segments.get('purged', 0)
+        if deltas:
+            reader = MultiSegmentReader([self.index_name] + deltas, self.postings_encoding, self.index_dir)
+        else:
+            reader = InvertedIndexReader(self.index_name, self.postings_encoding, self.index_dir)
+        self.reader = reader.__enter__()
+        self.doc_length = self.reader.doc_length
+        self.avg_doc_length = self.reader.avg_doc_length
+        self.load_term_stats(deltas)
+        self.impact_index = None
+        # Impact-ordered index hanya memuat main index
+        if not deltas and ImpactIndex.exists(self.impact_index_name(), self.index_dir):
+            self.impact_index = ImpactIndex(self.impact_index_name(), self.index_dir)
+        self.doc_vectors = None
+        if os.path.exists(self.doc_vectors_path()):
+            self.doc_vectors = DocVectors(self.doc_vectors_path())
+        self.doc_store = None
+        if os.path.exists(self.doc_store_path()):
+            self.doc_store = DocumentStore(self.doc_store_path())
+
+    def doc_vectors_path(self):
+        return DocVectors.path_for(self.index_dir, self.index_name)
+
+    def document_path(self, doc_id):
+        """
+        Path file dokumen doc_id. Index lama menyimpan nama dokumen relatif
+        terhadap directory kerja saat indexing (misal ./collection\\1\\4.txt).
+        """
+        doc_name = self.doc_id_map[doc_id].replace('\\', '/')
+        if doc_name.startswith('./'):
+            doc_name = doc_name.split('/', 2)[2]
+        return os.path.join(self.data_dir, doc_name)
+
+    def doc_store_path(self, directory = None):
+        return DocumentStore.path_for(directory or self.index_dir, self.index_name)
+
+    def document_id(self, doc_path):
+        """
+        docID dokumen dengan path doc_path relatif terhadap data_dir (misal
+        "1/10.txt"), termasuk untuk nama dokumen index lama; None jika tidak ada
+        """
+        prefix = os.path.join('.', os.path.basename(os.path.normpath(self.data_dir)))
+        for doc_name in [doc_path, prefix + '\\' + doc_path.replace('/', '\\'), prefix + '/' + doc_path]:
+            if doc_name in self.doc_id_map:
+                return self.doc_id_map[doc_name]
+        return None
+
+    def document_text(self, doc_id):
+        """Teks dokumen doc_id, dari document store jika ada, atau dari file-nya"""
+        if self.doc_store is not None:
+            text = self.doc_store.get(doc_id)
+            if text is not None:
+                return text
+        with open(self.document_path(doc_id)) as f:
+            return f.read()
+
+    def write_document_store(self, path, n_docs, deleted = None, source = None):
+        """
+        Menulis document store berisi dokumen docID 0 .. n_docs - 1 kecuali
+        yang ada di deleted. Dokumen yang sudah ada di store source disalin
+        dalam bentuk terkompresi; sisanya dibaca dari file-nya (dokumen yang
+        file-nya sudah tidak ada dilewati).
+        """
+        def blobs():
+            for doc_id in range(n_docs):
+                if deleted and doc_id in deleted:
+                    continue
+                blob = source.raw(doc_id) if source is not None else b''
+                if not blob:
+                    try:
+                        with open(self.document_path(doc_id)) as f:
+                            blob = DocumentStore.compress(f.read())
+                    except FileNotFoundError:
+                        continue
+                yield doc_id, blob
+
+        DocumentStore.write(path, n_docs, blobs())
+
+    def build_document_store(self):
+        """
+        Menyimpan teks semua dokumen index yang sedang aktif ke document
+        store (dipanggil oleh index() jika store_documents, atau secara
+        offline untuk index yang sudah ada)
+        """
+        self.load()
+        self.write_document_store(self.doc_store_path(), len(self.doc_id_map), self.deleted)
+        if self.doc_store is not None:
+            self.doc_store.close()
+        self.doc_store = DocumentStore(self.doc_store_path())
+
+    def build_doc_vectors(self, model, dictionary = None, batch_size = 1024):
+        """
+        Langkah offline setelah index(): menghitung vektor LSI semua dokumen
+        (sama dengan features.project untuk teks lowercase yang di-split
+        dengan whitespace, seperti saat reranking) lalu menyimpannya sebagai
+        matriks float32 yang diindeks docID, beserta sidik jari model (lihat
+        docvectors.DocVectors). Baris dokumen yang dihapus atau yang teksnya
+        sudah tidak ada bernilai nol. Perlu gensim/scipy (lihat features.py).
+
+        Parameters
+        ----------
+        model: gensim LsiModel yang dipakai untuk fitur reranking
+        dictionary: gensim Dictionary atau None, lihat features.features_batch
+        batch_size: int
+            Banyaknya dokumen per perkalian matriks
+        """
+        from .features import project, lsi_fingerprint, NUM_LATENT_TOPICS
+
+        self.load()
+        n_docs = len(self.doc_id_map)
+
+        def batches():
+            for start in range(0, n_docs, batch_size):
+                texts = []
+                for doc_id in range(start, min(start + batch_size, n_docs)):
+                    text = ''
+                    if doc_id not in self.deleted:
+                        try:
+                            text = self.document_text(doc_id)
+                        except FileNotFoundError:
+                            pass
+                    texts.append(text.lower().split())
+                yield start, project(texts, model, dictionary)
+
+        DocVectors.build(self.doc_vectors_path(), n_docs, NUM_LATENT_TOPICS, batches(),
+                         lsi_fingerprint(model, dictionary))
+        self.doc_vectors = DocVectors(self.doc_vectors_path())
+
+    def index_version(self):
+        """
+        Penanda isi index yang sedang dimuat: berubah setiap kali
+        generation (termasuk delta baru), banyaknya dokumen, atau banyaknya
+        dokumen yang dihapus berubah (misalnya untuk invalidasi cache hasil)
+        """
+        self.load()
+        return (self.generation, self.generation_id, len(self.doc_id_map), len(self.deleted))
+
+    def deleted_path(self, directory = None):
+        return os.path.join(directory or self.index_dir, self.index_name + '.deleted')
 
-        with open(os.path.join(self.output_dir, 'terms.dict'), 'rb') as f:
-            self.term_id_map = pickle.load(f)
-        with open(os.path.join(self.output_dir, 'docs.dict'), 'rb') as f:
-            self.doc_id_map = pickle.load(f)
-        with InvertedIndexReader(self.index_name, self.postings_encoding, self.output_dir) as qero:
-            self.doc_length = qero.doc_length
-            self.avg_doc_length = qero.avg_doc_length
+    def document_count(self):
+        """
+        N untuk IDF: banyaknya dokumen yang postings-nya masih ada di index,
+        termasuk dokumen yang dihapus tetapi belum dibuang oleh compact().
+        df juga masih menghitung postings dokumen tersebut, sehingga
+        df <= N dan IDF tidak pernah negatif (batas atas WAND tetap valid).
+        """
+        return len(self.doc_id_map) - self.purged
+
+    def refresh_deletions(self):
+        """
+        Memuat ulang deletion bitmap jika sudah diubah oleh proses lain.
+        Mengembalikan True jika bitmap dimuat ulang.
+        """
+        if not self.deleted.changed_on_disk():
+            return False
+        # N (lihat document_count) baru berubah setelah compact(), yang
+        # mem-publish generation baru, sehingga statistik term tetap berlaku
+        self.deleted = DeletionBitmap(self.deleted_path())
+        return True
+
+    def load_term_stats(self, deltas):
+        """
+        Memuat statistik term (lihat build_term_statistics) jika masih
+        berlaku untuk index yang dimuat, atau None
+        """
+        self.term_stats = None
+        # Statistik term hanya mencakup main index
+        if not deltas and TermStatistics.exists(self.term_stats_path()):
+            term_stats = TermStatistics(self.term_stats_path())
+            # Statistik yang dibangun untuk koleksi lain (N berbeda) diabaikan
+            if term_stats.n == self.document_count():
+                self.term_stats = term_stats
+
+    def term_stats_path(self):
+        return os.path.join(self.index_dir, self.index_name + '.termstats')
+
+    def build_term_statistics(self, k1 = 1.5, b = 0.7):
+        """
+        Menghitung df, max TF, varian IDF, dan batas atas BM25 untuk setiap
+        term di main index, lalu menyimpannya di samping main index
+        (lihat stats.TermStatistics).
+        """
+        with InvertedIndexReader(self.index_name, self.postings_encoding, directory=self.index_dir) as reader:
+            TermStatistics.build(self.term_stats_path(), reader, self.document_count(), k1, b)
+
+    def impact_index_name(self):
+        return self.index_name + '_impact'
+
+    def build_impact_index(self, k1 = 1.5, b = 0.7, bits = 8):
+        """
+        Membangun impact-ordered index untuk BM25 (k1 dan b tetap) dari main
+        index, dengan skor per posting yang dikuantisasi ke `bits` bit.
+        """
+        with InvertedIndexReader(self.index_name, self.postings_encoding, directory=self.index_dir) as reader:
+            ImpactIndex.build(reader, self.impact_index_name(), self.index_dir, self.document_count(),
+                              reader.doc_length, reader.avg_doc_length, k1, b, bits)
+
+    def close(self):
+        """Menutup reader main index yang dibuka oleh load()"""
+        if self.reader is not None:
+            self.reader.__exit__(None, None, None)
+            self.reader = None
+        if self.impact_index is not None:
+            self.impact_index.close()
+            self.impact_index = None
+        if self.doc_store is not None:
+            self.doc_store.close()
+            self.doc_store = None
+
+    def reload(self):
+        """Membuang state yang resident lalu memuat ulang index dari disk"""
+        self.close()
+        self.load()
+
+    def manifest_path(self):
+        return os.path.join(self.output_dir, self.MANIFEST_NAME)
+
+    def read_manifest(self):
+        """Isi manifest CURRENT ({generation, directory}), atau None untuk layout lama"""
+        try:
+            with open(self.manifest_path()) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def current_generation(self):
+        """Nomor generation yang sedang aktif di disk"""
+        manifest = self.read_manifest()
+        return manifest['generation'] if manifest is not None else None
+
+    def current_directory(self):
+        """Directory generation yang sedang aktif di disk"""
+        manifest = self.read_manifest()
+        return self.output_dir if manifest is None else os.path.join(self.output_dir, manifest['directory'])
+
+    def resolve_generation(self):
+        """Mengarahkan index_dir ke generation yang sedang aktif"""
+        manifest = self.read_manifest()
+        if manifest is None:
+            self.generation, self.generation_id, self.index_dir = None, None, self.output_dir
+        else:
+            self.generation = manifest['generation']
+            # id acak per publish: generation dengan nomor yang sama (misalnya
+            # setelah output_dir dihapus lalu dibangun ulang) tetap berbeda
+            self.generation_id = manifest.get('id')
+            self.index_dir = os.path.join(self.output_dir, manifest['directory'])
+
+    def refresh(self):
+        """
+        Memuat ulang index jika generation di disk sudah berganti sejak
+        load() (index dibangun ulang, compaction, atau delta segment baru).
+        Mengembalikan True jika reload dilakukan.
+        """
+        if self.reader is not None and self.current_generation() == self.generation:
+            self.refresh_deletions()
+            return False
+        self.reload()
+        return True
+
+    def generation_numbers(self):
+        numbers = []
+        for name in os.listdir(self.output_dir):
+            match = self.GENERATION_DIR.match(name)
+            if match and os.path.isdir(os.path.join(self.output_dir, name)):
+                numbers.append(int(match.group(1)))
+        return numbers
+
+    def new_generation(self):
+        """
+        Membuat directory generation baru (kosong) di output_dir.
+        Mengembalikan (nomor generation, path directory).
+        """
+        generation = max(self.generation_numbers() + [self.current_generation() or 0]) + 1
+        while True:
+            directory = os.path.join(self.output_dir, 'generation_%06d' % generation)
+            try:
+                os.makedirs(directory)
+                return generation, directory
+            except FileExistsError:
+                # generation yang sama sedang dibangun oleh proses lain
+                generation += 1
+
+    def publish_generation(self, generation, directory):
+        """
+        Mengaktifkan generation yang sudah selesai ditulis dengan mengganti
+        manifest CURRENT secara atomik (os.replace), lalu menghapus
+        generation lama di luar keep_generations terakhir. Searcher yang
+        masih memegang file generation lama tetap bisa membacanya (POSIX).
+        """
+        tmp_path = '%s.%d.tmp' % (self.manifest_path(), os.getpid())
+        with open(tmp_path, 'w') as f:
+            json.dump({'generation': generation, 'directory': os.path.basename(directory),
+                       'id': uuid.uuid4().hex}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.manifest_path())
+        for number in self.generation_numbers():
+            if number <= generation - self.keep_generations:
+                shutil.rmtree(os.path.join(self.output_dir, 'generation_%06d' % number), ignore_errors = True)
+
+    def segments_path(self, directory = None):
+        return os.path.join(directory or self.index_dir, self.index_name + '.segments.json')
+
+    def read_segments(self, directory = None):
+        """
+        Daftar delta segment milik main index, berupa dictionary dengan key
+        deltas (nama index setiap delta, terurut sesuai docID) dan
+        next_delta (nomor untuk delta berikutnya)
+        """
+        if not os.path.exists(self.segments_path(directory)):
+            return {'deltas': [], 'next_delta': 0}
+        with open(self.segments_path(directory)) as f:
+            return json.load(f)
+
+    def write_segments(self, segments, directory = None):
+        # ditulis ke file sementara lalu di-rename, sehingga pembaca tidak
+        # pernah melihat file yang setengah ditulis
+        tmp_path = self.segments_path(directory) + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(segments, f)
+        os.replace(tmp_path, self.segments_path(directory))
+
+    def index_incremental(self):
+        """
+        Indexing incremental: dokumen di data_dir yang belum ada di
+        doc_id_map (block directory baru, atau file baru di block lama)
+        di-invert menjadi satu delta segment <index_name>_delta_<i>, tanpa
+        membangun ulang main index. docID dokumen baru selalu lebih besar
+        dari docID yang sudah ada, sehingga query cukup membaca main index
+        dan semua delta secara berurutan (lihat segments.MultiSegmentReader).
+
+        Dokumen lama yang isinya berubah tidak di-index ulang di sini.
+
+        Delta digabungkan kembali ke main index oleh compact(). Delta
+        diaktifkan sebagai generation baru (lihat write_delta), sehingga
+        searcher melihat dokumen baru setelah refresh().
+
+        Returns
+        -------
+        str atau None
+            Nama delta segment yang dibuat, atau None jika tidak ada dokumen baru
+        """
+        self.refresh()
+        new_docs = [doc_path for doc_path in self.document_paths(sorted(next(os.walk(self.data_dir))[1]))
+                    if doc_path not in self.doc_id_map]
+        if not new_docs:
+            return None
+
+        return self.write_delta(list(zip(self.doc_id_map.get_ids(new_docs), new_docs)))
+
+    def write_delta(self, docs, replaced_doc_ids = ()):
+        """
+        Meng-invert docs (list of (docID, path)) menjadi satu delta segment
+        baru, lalu menandai replaced_doc_ids sebagai dihapus.
+
+        Delta, IdMap, daftar segment, dan bitmap ditulis ke generation baru
+        yang berisi hard link file-file generation aktif (file generation
+        aktif tidak pernah diubah), lalu diaktifkan sekaligus dengan
+        publish_generation. Pembaca tidak pernah melihat IdMap dan daftar
+        segment dari dua keadaan yang berbeda, dan searcher lain melihat
+        dokumen baru setelah refresh() mendeteksi generation baru.
+
+        Mengembalikan nama delta segment, atau None jika docs tidak
+        menghasilkan term sama sekali.
+        """
+        td_pairs = self.parse_documents(docs)
+        delta_name = None
+        with self.segments_lock:
+            source_dir = self.index_dir
+            generation, directory = self.new_generation()
+            # IdMap, daftar segment, dan bitmap ditulis ulang di bawah
+            rewritten = {'terms.idmap', 'docs.idmap', os.path.basename(self.segments_path())}
+            for name in os.listdir(source_dir):
+                path = os.path.join(source_dir, name)
+                if name not in rewritten and not name.endswith('.tmp') and os.path.isfile(path):
+                    link_or_copy(path, os.path.join(directory, name))
+            segments = self.read_segments(source_dir)
+            if td_pairs:
+                delta_name = self.index_name + '_delta_' + str(segments['next_delta'])
+                with InvertedIndexWriter(delta_name, self.postings_encoding, directory = directory,
+                                         compact_dict = True, block_size = self.block_size) as index:
+                    self.invert_write(td_pairs, index)
+                segments['deltas'].append(delta_name)
+                segments['next_delta'] += 1
+            self.save(directory)
+            self.write_segments(segments, directory)
+            if replaced_doc_ids:
+                for doc_id in replaced_doc_ids:
+                    self.deleted.add(doc_id)
+                # ditulis ke file baru (rename), hard link di generation
+                # lama tidak ikut berubah
+                self.deleted.save(self.deleted_path(directory))
+            self.publish_generation(generation, directory)
+        self.reload()
+        return delta_name
+
+    def delete_documents(self, doc_paths):
+        """
+        Menghapus dokumen (path relatif terhadap data_dir, seperti di
+        doc_id_map) dari hasil retrieval. docID-nya ditandai di deletion
+        bitmap (<index_name>.deleted, lihat deletions.DeletionBitmap) dan
+        langsung disaring oleh semua metode retrieval; postings-nya baru
+        dibuang secara fisik oleh compact() berikutnya.
+
+        Returns
+        -------
+        int
+            Banyaknya dokumen yang baru dihapus
+        """
+        self.refresh()
+        with self.segments_lock:
+            count = 0
+            for doc_path in doc_paths:
+                if doc_path in self.doc_id_map and self.deleted.add(self.doc_id_map[doc_path]):
+                    count += 1
+            if count:
+                self.deleted.save()
+        return count
+
+    def update_documents(self, doc_paths):
+        """
+        Meng-index ulang dokumen yang isinya berubah: docID lama ditandai
+        dihapus dan dokumen di-index sebagai dokumen baru (docID baru,
+        lihat IdMap.reassign) di sebuah delta segment. Dokumen yang belum
+        pernah di-index diperlakukan sebagai dokumen baru.
+
+        Returns
+        -------
+        str atau None
+            Nama delta segment yang dibuat
+        """
+        self.refresh()
+        docs, replaced = [], []
+        for doc_path in doc_paths:
+            if doc_path in self.doc_id_map:
+                replaced.append(self.doc_id_map[doc_path])
+                docs.append((self.doc_id_map.reassign(doc_path), doc_path))
+            else:
+                docs.append((self.doc_id_map[doc_path], doc_path))
+        return self.write_delta(docs, replaced)
+
+    def compact(self):
+        """
+        Menggabungkan main index dan semua delta segment menjadi main index
+        baru dengan merge (docID antar segment tidak tumpang tindih, sehingga
+        block postings cukup disalin) di generation baru, lalu membangun
+        ulang statistik term dan impact-ordered index dan mengaktifkan
+        generation tersebut (lihat publish_generation). Delta yang
+        ditambahkan selama compaction berjalan ikut dibawa ke generation baru.
+
+        Compaction dijalankan oleh instance terpisah (lihat copy), sehingga
+        instance ini, yang mungkin sedang melayani query di thread lain,
+        tidak diubah dan tetap membaca generation lama sampai refresh() atau
+        reload() dipanggil (misalnya oleh SearchEngine.refresh_index).
+
+        Postings milik dokumen yang dihapus (lihat delete_documents) dibuang
+        saat merge; bitmap tetap dibawa ke generation baru karena docID
+        tidak pernah dipakai ulang.
+
+        Returns
+        -------
+        bool
+            True jika ada delta yang digabungkan atau dokumen yang dibuang
+        """
+        with self.compaction_lock:
+            index = self.copy()
+            try:
+                return index.compact_segments()
+            finally:
+                index.close()
+
+    def copy(self):
+        """
+        Instance baru (belum di-load) dengan konfigurasi dan lock yang sama,
+        misalnya untuk compaction tanpa mengubah instance yang sedang dipakai
+        """
+        index = BSBIIndex(self.data_dir, self.output_dir, self.postings_encoding, self.index_name,
+                          self.block_size, self.impact_ordered, self.analyzer, self.keep_generations,
+                          self.memory_budget, self.store_documents)
+        index.segments_lock = self.segments_lock
+        index.compaction_lock = self.compaction_lock
+        return index
+
+    def compact_segments(self):
+        """Isi compact(), dijalankan pada instance hasil copy()"""
+        self.load()
+        source_dir = self.index_dir
+        with self.segments_lock:
+            segments = self.read_segments()
+            deltas = segments['deltas']
+            deleted = DeletionBitmap(self.deleted_path())
+            n = len(self.doc_id_map) - len(deleted)
+            n_docs = len(self.doc_id_map)
+        if not deltas and len(deleted) == segments.get('purged', 0):
+            return False
+
+        generation, directory = self.new_generation()
+        with InvertedIndexWriter(self.index_name, self.postings_encoding, directory = directory,
+                                 compact_dict = True, block_size = self.block_size) as merged_index:
+            with contextlib.ExitStack() as stack:
+                indices = [stack.enter_context(InvertedIndexReader(index_id, self.postings_encoding, directory=source_dir))
+                               for index_id in [self.index_name] + deltas]
+                self.merge(indices, merged_index, deleted)
+        with InvertedIndexReader(self.index_name, self.postings_encoding, directory=directory) as reader:
+            TermStatistics.build(os.path.join(directory, self.index_name + '.termstats'), reader, n)
+            if self.impact_ordered:
+                ImpactIndex.build(reader, self.impact_index_name(), directory, n,
+                                  reader.doc_length, reader.avg_doc_length)
+        # Dokumen di store lama disalin tanpa dekompresi, dokumen dari
+        # delta ditambahkan, dan dokumen yang dihapus dibuang
+        if self.doc_store is not None:
+            self.write_document_store(self.doc_store_path(directory), n_docs, deleted, self.doc_store)
+
+        with self.segments_lock:
+            # IdMap, bitmap, dan delta yang ditambahkan selama merge berjalan
+            # ada di generation yang sedang aktif (bisa lebih baru dari source_dir)
+            current_dir = self.current_directory()
+            segments = self.read_segments(current_dir)
+            segments['deltas'] = [delta for delta in segments['deltas'] if delta not in deltas]
+            # banyaknya dokumen terhapus yang postings-nya sudah dibuang
+            segments['purged'] = len(deleted)
+            files = ['terms.idmap', 'docs.idmap'] + [delta + ext for delta in segments['deltas']
+                                                      for ext in InvertedIndexReader.EXTENSIONS]
+            if os.path.exists(self.deleted_path(current_dir)):
+                files.append(self.index_name + '.deleted')
+            # docID tidak berubah oleh compaction, sehingga vektor LSI tetap valid
+            doc_vectors_path = DocVectors.path_for(current_dir, self.index_name)
+            for path in [doc_vectors_path, DocVectors.metadata_path(doc_vectors_path)]:
+                if os.path.exists(path):
+                    files.append(os.path.basename(path))
+            for name in files:
+                link_or_copy(os.path.join(current_dir, name), os.path.join(directory, name))
+            with open(os.path.join(directory, self.index_name + '.segments.json'), 'w') as f:
+                json.dump(segments, f)
+            self.publish_generation(generation, directory)
+        return True
+
+    def compact_in_background(self):
+        """Menjalankan compact() di thread terpisah; mengembalikan thread tersebut"""
+        thread = threading.Thread(target = self.compact, daemon = True)
+        thread.start()
+        return thread
 
 
     def invert_write(self, td_pairs, index):
@@ -79,7 +706,9 @@ class BSBIIndex:
         yaitu penggunaan struktur data hashtable (dalam Python bisa
         berupa Dictionary)
 
-        ASUMSI: td_pairs CUKUP di memori
+        ASUMSI: td_pairs CUKUP di memori. Karena itu invert_write hanya
+        dipakai untuk delta segment (lihat write_delta); index() memakai
+        invert_documents yang dibatasi memory_budget.
 
         Di Tugas Pemrograman 1, kita hanya menambahkan term dan
         juga list of sorted Doc IDs. Sekarang di Tugas Pemrograman 2,
@@ -104,14 +733,17 @@ class BSBIIndex:
             index.append(term_id, post_list, tf_list)
 
 
-    def merge(self, indices, merged_index):
+    def merge(self, indices, merged_index, deleted = None):
         """
         Lakukan merging ke semua intermediate inverted indices menjadi
         sebuah single index.
 
         Ini adalah bagian yang melakukan EXTERNAL MERGE SORT
 
-        Gunakan fungsi sorted_merge_posts_and_tfs(..) di modul util
+        Merge dilakukan secara streaming oleh merge.merge_indices: block
+        postings yang rentang docID-nya tidak tumpang tindih disalin tanpa
+        decoding, sehingga memori yang dipakai tidak bergantung pada panjang
+        postings list.
 
         Parameters
         ----------
@@ -124,19 +756,7 @@ class BSBIIndex:
             Instance InvertedIndexWriter object yang merupakan hasil merging dari
             semua intermediate InvertedIndexWriter objects.
         """
-        # kode berikut mengasumsikan minimal ada 1 term
-        merged_iter = heapq.merge(*indices, key = lambda x: x[0])
-        curr, postings, tf_list = next(merged_iter) # first item
-        for t, postings_, tf_list_ in merged_iter: # from the second item
-            if t == curr:
-                zip_p_tf = sorted_merge_posts_and_tfs(list(zip(postings, tf_list)), \
-                                                      list(zip(postings_, tf_list_)))
-                postings = [doc_id for (doc_id, _) in zip_p_tf]
-                tf_list = [tf for (_, tf) in zip_p_tf]
-            else:
-                merged_index.append(curr, postings, tf_list)
-                curr, postings, tf_list = t, postings_, tf_list_
-        merged_index.append(curr, postings, tf_list)
+        merge_indices(indices, merged_index, deleted = deleted)
 
     def parse_block(self, block_dir_relative):
         """
@@ -171,17 +791,77 @@ class BSBIIndex:
         termIDs dan docIDs. Dua variable ini harus 'persist' untuk semua pemanggilan
         parse_block(...).
         """
-        td_doc = set({})
-        files = os.listdir(os.path.join(self.data_dir, block_dir_relative))
+        files = sorted(os.listdir(os.path.join(self.data_dir, block_dir_relative)))
+        docs = [(self.doc_id_map[os.path.join(block_dir_relative, f)], os.path.join(block_dir_relative, f))
+                for f in files]
+        return self.parse_documents(docs)
+
+    def parse_documents(self, docs):
+        """
+        Parsing sekumpulan dokumen yang docID-nya sudah ditentukan menjadi
+        sequence of <termID, docID> pairs, memakai self.term_id_map.
+
+        Parameters
+        ----------
+        docs: List[Tuple[Int, str]]
+            List of (docID, relative path dokumen terhadap data_dir)
+
+        Returns
+        -------
+        List[Tuple[Int, Int]]
+            Semua pasangan <termID, docID> dari dokumen-dokumen tersebut
+        """
+        td_pairs = []
+        for doc_id, doc_path in docs:
+            with open(os.path.join(self.data_dir, doc_path)) as f:
+                text = self.process_corp(f.read())
+            # satu pasangan per kemunculan, sehingga invert_write bisa menghitung TF
+            for t_id in self.term_id_map.get_ids(text):
+                td_pairs.append((t_id, doc_id))
+        return td_pairs
+
+    def document_paths(self, block_dirs):
+        """Generator path dokumen (relatif terhadap data_dir) di block_dirs, terurut"""
+        for block_dir_relative in block_dirs:
+            for f in sorted(os.listdir(os.path.join(self.data_dir, block_dir_relative))):
+                yield os.path.join(block_dir_relative, f)
+
+    def invert_documents(self, docs, index_prefix):
+        """
+        Parsing dan inversion dokumen dengan SPIMI (lihat spimi.SpimiBuilder):
+        postings dan TF dikumpulkan langsung per term, dan sebuah intermediate
+        index <index_prefix><i> ditulis setiap kali perkiraan memorinya
+        mencapai memory_budget. Memori puncak tidak bergantung pada
+        banyaknya dokumen per sub-directory collection.
 
-        for f in files:
-            text = open(os.path.join(self.data_dir, os.path.join(block_dir_relative, f))).read()
-            text = self.process_corp(text.lower())
-            doc_id = self.doc_id_map.__getitem__(os.path.join(block_dir_relative, f))
-            for w in text:
-                t_id = self.term_id_map.__getitem__(text)
-                td_doc.add((t_id, doc_id))
-        return list(td_doc)
+        Parameters
+        ----------
+        docs: Iterable[Tuple[Int, str]]
+            (docID, relative path dokumen terhadap data_dir), docID menaik
+
+        Returns
+        -------
+        List[str]
+            Nama-nama intermediate index yang ditulis, terurut sesuai docID
+        """
+        builder = SpimiBuilder(self.memory_budget)
+        index_ids = []
+
+        def flush():
+            index_id = index_prefix + str(len(index_ids))
+            with InvertedIndexWriter(index_id, self.postings_encoding, directory = self.index_dir,
+                                     compact_dict = True, block_size = self.block_size) as index:
+                builder.flush(index)
+            index_ids.append(index_id)
+
+        for doc_id, doc_path in docs:
+            with open(os.path.join(self.data_dir, doc_path)) as f:
+                builder.add_document(doc_id, self.term_id_map.get_ids(self.process_corp(f.read())))
+            if builder.full():
+                flush()
+        if len(builder) > 0:
+            flush()
+        return index_ids
 
 
     def retrieve_tfidf(self, query, k = 10):
@@ -226,24 +906,30 @@ class BSBIIndex:
         queries = self.process_corp(query)
         res = {}
         resultat = []
-        with InvertedIndexReader(self.index_name, self.postings_encoding, self.output_dir) as qero:
-            for i in queries:
-                if i not in self.term_id_map: continue
-                postings_list_tf= qero.get_postings_list(self.term_id_map[i])
-                for j in range(len(postings_list_tf[0])):
-                    doc_name = self.doc_id_map[postings_list_tf[0][j]]
-                    n = len(self.doc_id_map)
-                    tf = postings_list_tf[1][j]
-                    df = qero.postings_dict[postings_list_tf[0][j]][1]
-                    wtq = math.log(n/df)
-                    wtd = 0
-                    if tf > 0:
-                        wtd = 1 + math.log(tf)
-                    if res.get(doc_name):
-                        res[doc_name] = res[doc_name] + (wtd * wtq)
-                    else:
-                        res[doc_name] = (wtd * wtq)
-            resultat = list(zip(res.values(), res.keys()))
+        qero = self.reader
+        deleted = self.deleted
+        n = self.document_count()
+        for i in queries:
+            if i not in self.term_id_map: continue
+            term_id = self.term_id_map[i]
+            if term_id not in qero.postings_dict: continue
+            postings_list_tf= qero.get_postings_list(term_id)
+            if self.term_stats is not None:
+                wtq = float(self.term_stats.idf[term_id])
+            else:
+                wtq = math.log(n/qero.postings_dict[term_id][1])
+            for j in range(len(postings_list_tf[0])):
+                if postings_list_tf[0][j] in deleted: continue
+                doc_name = self.doc_id_map[postings_list_tf[0][j]]
+                tf = postings_list_tf[1][j]
+                wtd = 0
+                if tf > 0:
+                    wtd = 1 + math.log(tf)
+                if res.get(doc_name):
+                    res[doc_name] = res[doc_name] + (wtd * wtq)
+                else:
+                    res[doc_name] = (wtd * wtq)
+        resultat = list(zip(res.values(), res.keys()))
         resultat = sorted(resultat, key=lambda x: x[0], reverse=True)
         return resultat[:k]
 
@@ -289,25 +975,32 @@ class BSBIIndex:
         queries = self.process_corp(query)
         res = {}
         resultat = []
-        with InvertedIndexReader(self.index_name, self.postings_encoding, self.output_dir) as qero:
-            for i in queries:
-                if i not in self.term_id_map: continue
-                postings_list_tf= qero.get_postings_list(self.term_id_map[i])
-                for j in range(len(postings_list_tf[0])):
-                    doc_name = self.doc_id_map[postings_list_tf[0][j]]
-                    n = len(self.doc_id_map)
-                    tf = postings_list_tf[1][j]
-                    max_tf = max(postings_list_tf[1])
-                    df = qero.postings_dict[postings_list_tf[0][j]][1]
-                    wtq = math.log(n/(1 + df)) + 1
-                    wtd = 0.5 + 0.5 * tf / max_tf
-                    if res.get(doc_name):
-                        res[doc_name] = res[doc_name] + (wtd * wtq)
-                    else:
-                        res[doc_name] = (wtd * wtq)
-            resultat = list(zip(res.values(), res.keys()))
+        qero = self.reader
+        deleted = self.deleted
+        n = self.document_count()
+        for i in queries:
+            if i not in self.term_id_map: continue
+            term_id = self.term_id_map[i]
+            if term_id not in qero.postings_dict: continue
+            postings_list_tf= qero.get_postings_list(term_id)
+            if self.term_stats is not None:
+                max_tf = int(self.term_stats.max_tf[term_id])
+                wtq = float(self.term_stats.idf_smooth[term_id])
+            else:
+                max_tf = max(postings_list_tf[1])
+                wtq = math.log(n/(1 + qero.postings_dict[term_id][1])) + 1
+            for j in range(len(postings_list_tf[0])):
+                if postings_list_tf[0][j] in deleted: continue
+                doc_name = self.doc_id_map[postings_list_tf[0][j]]
+                tf = postings_list_tf[1][j]
+                wtd = 0.5 + 0.5 * tf / max_tf
+                if res.get(doc_name):
+                    res[doc_name] = res[doc_name] + (wtd * wtq)
+                else:
+                    res[doc_name] = (wtd * wtq)
+        resultat = list(zip(res.values(), res.keys()))
         resultat = sorted(resultat, key=lambda x: x[0], reverse=True)
-        return resultat
+        return resultat[:k]
     
     def retrieve_bm25(self, query, k=10, k1=1.5, b=0.7):
         """
@@ -347,56 +1040,303 @@ class BSBIIndex:
         self.load()
 
         queries = self.process_corp(query)
-        res = {}
-        resultat = []
-        with InvertedIndexReader(self.index_name, self.postings_encoding, self.output_dir) as qero:
-            for i in queries:
-                if i not in self.term_id_map: continue
-                postings_list_tf= qero.get_postings_list(self.term_id_map[i])
-                for j in range(len(postings_list_tf[0])):
-                    doc_name = self.doc_id_map[postings_list_tf[0][j]]
-                    doc_length = self.doc_length[postings_list_tf[0][j]]
-                    n = len(self.doc_id_map)
-                    tf = postings_list_tf[1][j]
-                    df = qero.postings_dict[postings_list_tf[0][j]][1]
-                    wtq = math.log(n/df)
-                    wtd = ((k1 + 1) * tf) / (k1 * ((1 - b) + (b * doc_length / self.avg_doc_length)) + tf)
-                    if res.get(doc_name):
-                        res[doc_name] = res[doc_name] + (wtd * wtq)
-                    else:
-                        res[doc_name] = (wtd * wtq)
-            resultat = list(zip(res.values(), res.keys()))
-        resultat = sorted(resultat, key=lambda x: x[0], reverse=True)
+        qero = self.reader
+        deleted = self.deleted
+        n = self.document_count()
+        # Akumulator skor per docID; panjang dokumen satu postings list
+        # dibaca sekaligus dari DocLengths (vectorized)
+        scores = np.zeros(len(self.doc_id_map))
+        matched = np.zeros(len(self.doc_id_map), dtype=bool)
+        for i in queries:
+            if i not in self.term_id_map: continue
+            term_id = self.term_id_map[i]
+            if term_id not in qero.postings_dict: continue
+            postings_list, tf_list = qero.get_postings_list(term_id)
+            if self.term_stats is not None:
+                wtq = float(self.term_stats.idf[term_id])
+            else:
+                wtq = math.log(n/qero.postings_dict[term_id][1])
+            postings = np.asarray(postings_list, dtype=np.int64)
+            tf = np.asarray(tf_list, dtype=np.float64)
+            doc_length = self.doc_length.take(postings)
+            wtd = ((k1 + 1) * tf) / (k1 * ((1 - b) + (b * doc_length / self.avg_doc_length)) + tf)
+            scores[postings] += wtd * wtq
+            matched[postings] = True
+        if deleted:
+            deleted_ids = deleted.doc_ids()
+            matched[deleted_ids[deleted_ids < matched.size]] = False
+        candidates = np.flatnonzero(matched)
+        if candidates.size > k:
+            candidates = candidates[np.argpartition(-scores[candidates], k - 1)[:k]]
+        resultat = sorted(((float(scores[d]), self.doc_id_map[int(d)]) for d in candidates),
+                          key=lambda x: x[0], reverse=True)
         return resultat[:k]
 
 
-    def index(self):
+    def retrieve_bm25_impact(self, query, k = 10, budget = None):
+        """
+        Ranked Retrieval BM25 dengan skema SaaT (Score-at-a-Time) di atas
+        impact-ordered index (lihat build_impact_index). Skor setiap posting
+        sudah dihitung dan dikuantisasi saat indexing, sehingga query cukup
+        berupa akumulasi integer dari segment impact terbesar; budget
+        (banyaknya posting) bisa dipakai untuk early termination.
+
+        Skor yang dikembalikan adalah aproksimasi skor retrieve_bm25 dengan
+        k1 dan b yang dipakai saat build. Jika impact-ordered index belum
+        dibangun, method ini memanggil retrieve_bm25.
+
+        Result
+        ------
+        List[(int, str)]
+            List of tuple: elemen pertama adalah score similarity, dan yang
+            kedua adalah nama dokumen.
+            Daftar Top-K dokumen terurut mengecil BERDASARKAN SKOR.
+        """
+        self.load()
+
+        if self.impact_index is None:
+            return self.retrieve_bm25(query, k)
+        term_counts = {}
+        for term, count in Counter(self.process_corp(query)).items():
+            if term not in self.term_id_map: continue
+            term_counts[self.term_id_map[term]] = count
+        top = self.impact_index.score_at_a_time(term_counts, len(self.doc_id_map), k, budget, self.deleted)
+        return [(score, self.doc_id_map[doc_id]) for score, doc_id in top]
+
+    def retrieve_wand(self, query, k = 10, scoring = "bm25", k1 = 1.5, b = 0.7, deadline = None):
+        """
+        Melakukan Ranked Retrieval dengan skema DaaT (Document-at-a-Time)
+        dengan dynamic pruning Block-Max WAND. Hanya top-K dokumen yang
+        disimpan (bounded heap), dan posting yang tidak mungkin masuk top-K
+        dilewati dengan skip pointer tanpa di-score.
+
+        Hasilnya sama dengan retrieve_tfidf, retrieve_0_5_tf_max_norm_smooth_idf,
+        atau retrieve_bm25 (sesuai parameter scoring), tetapi hanya sebagian
+        kecil postings yang di-score untuk term dengan df tinggi.
+
+        Parameters
+        ----------
+        query: str
+            Query tokens yang dipisahkan oleh spasi
+        scoring: str
+            "tfidf", "tf_max_norm", atau "bm25"
+        deadline: float atau None
+            Batas waktu (time.monotonic()); lihat daat.wand_top_k
+
+        Result
+        ------
+        List[(int, str)]
+            List of tuple: elemen pertama adalah score similarity, dan yang
+            kedua adalah nama dokumen.
+            Daftar Top-K dokumen terurut mengecil BERDASARKAN SKOR.
+        """
+        return [(score, self.doc_id_map[doc_id])
+                for score, doc_id in self.wand_doc_ids(query, k, scoring, k1, b, deadline)]
+
+    def wand_doc_ids(self, query, k = 10, scoring = "bm25", k1 = 1.5, b = 0.7, deadline = None):
+        """Seperti retrieve_wand, tetapi mengembalikan list of (score, docID)"""
+        self.load()
+
+        n = self.document_count()
+        if scoring == "tfidf":
+            scheme = TfIdfScoring(n)
+        elif scoring == "tf_max_norm":
+            scheme = TfMaxNormScoring(n)
+        elif scoring == "bm25":
+            scheme = BM25Scoring(n, self.doc_length, self.avg_doc_length, k1, b)
+        else:
+            raise ValueError(f"scoring tidak dikenal: {scoring}")
+
+        cursors = []
+        for term, count in Counter(self.process_corp(query)).items():
+            if term not in self.term_id_map: continue
+            term_id = self.term_id_map[term]
+            if term_id not in self.reader.postings_dict: continue
+            cursor = self.reader.cursor(term_id)
+            if self.term_stats is not None and scoring != "tf_max_norm":
+                cursor.weight = float(self.term_stats.idf[term_id]) * count
+            elif self.term_stats is not None:
+                cursor.weight = float(self.term_stats.idf_smooth[term_id]) * count
+            else:
+                cursor.weight = scheme.term_weight(cursor.df) * count
+            # Batas atas skor BM25 term sudah dihitung saat indexing
+            if (scoring == "bm25" and self.term_stats is not None
+                    and (self.term_stats.k1, self.term_stats.b) == (k1, b)):
+                cursor.upper_bound = float(self.term_stats.bm25_ub[term_id]) * count
+            cursors.append(cursor)
+        return wand_top_k(cursors, scheme, k, self.deleted, deadline)
+
+    def score_bm25(self, query, doc_ids, k1 = 1.5, b = 0.7, deadline = None):
+        """
+        Skor BM25 (sama dengan retrieve_bm25) hanya untuk kandidat doc_ids,
+        misalnya hasil tahap pertama cascade ranking (lihat cascade). Setiap
+        postings list dibaca dengan cursor yang melompat ke docID kandidat,
+        sehingga hanya block yang memuat kandidat yang di-decode.
+
+        Parameters
+        ----------
+        doc_ids: List[int]
+        deadline: float atau None
+            Batas waktu (time.monotonic()), dicek per term query
+
+        Returns
+        -------
+        np.ndarray atau None
+            Skor setiap doc_ids (urutan yang sama), atau None jika deadline
+            terlewati sebelum semua term di-score
+        """
+        self.load()
+
+        n = self.document_count()
+        order = np.argsort(doc_ids, kind='stable')
+        sorted_ids = [int(doc_ids[i]) for i in order]
+        norm = k1 * ((1 - b) + (b * self.doc_length.take(sorted_ids) / self.avg_doc_length))
+        scores = np.zeros(len(sorted_ids))
+        for term, count in Counter(self.process_corp(query)).items():
+            if deadline is not None and time.monotonic() >= deadline:
+                return None
+            if term not in self.term_id_map: continue
+            term_id = self.term_id_map[term]
+            if term_id not in self.reader.postings_dict: continue
+            if self.term_stats is not None:
+                wtq = float(self.term_stats.idf[term_id])
+            else:
+                wtq = math.log(n / self.reader.postings_dict[term_id][1])
+            cursor = self.reader.cursor(term_id)
+            for i, doc_id in enumerate(sorted_ids):
+                cursor.next_geq(doc_id)
+                if cursor.doc == PostingsCursor.END:
+                    break
+                if cursor.doc == doc_id:
+                    scores[i] += count * wtq * ((k1 + 1) * cursor.tf) / (norm[i] + cursor.tf)
+        result = np.empty(len(sorted_ids))
+        result[order] = scores
+        return result
+
+
+    def index(self, workers = 1):
         """
         Base indexing code
         BAGIAN UTAMA untuk melakukan Indexing dengan skema BSBI (blocked-sort
         based indexing)
 
-        Method ini scan terhadap semua data di collection, memanggil parse_block
-        untuk parsing dokumen dan memanggil invert_write yang melakukan inversion
-        di setiap block dan menyimpannya ke index yang baru.
-        """
-        # loop untuk setiap sub-directory di dalam folder collection (setiap block)
-        for block_dir_relative in tqdm(sorted(next(os.walk(self.data_dir))[1])):
-            td_pairs = self.parse_block(block_dir_relative)
-            index_id = 'intermediate_index_'+block_dir_relative
-            self.intermediate_indices.append(index_id)
-            with InvertedIndexWriter(index_id, self.postings_encoding, directory = self.output_dir) as index:
-                self.invert_write(td_pairs, index)
-                td_pairs = None
-    
+        Method ini scan terhadap semua data di collection, lalu parsing dan
+        inversion dokumen dengan SPIMI (lihat invert_documents): intermediate
+        index ditulis setiap kali memory_budget tercapai, bukan per
+        sub-directory, lalu semua intermediate index di-merge.
+
+        Semua file ditulis ke directory generation baru; generation tersebut
+        baru dipakai pembaca setelah seluruh index selesai ditulis (lihat
+        publish_generation), sehingga indexing aman dijalankan saat index
+        sedang dipakai untuk query.
+
+        Parameters
+        ----------
+        workers: int
+            Banyaknya process untuk parsing dan inversion block. Jika lebih
+            dari 1, block diproses paralel (lihat invert_blocks_parallel);
+            postings hasil index sama dengan indexing serial.
+        """
+        generation, self.index_dir = self.new_generation()
+        self.intermediate_indices = []
+        # index dibangun ulang dari data_dir, tanpa dokumen yang dihapus
+        self.deleted = DeletionBitmap()
+        self.purged = 0
+        block_dirs = sorted(next(os.walk(self.data_dir))[1])
+        if workers > 1:
+            self.invert_blocks_parallel(block_dirs, workers)
+        else:
+            docs = ((self.doc_id_map[doc_path], doc_path) for doc_path in self.document_paths(tqdm(block_dirs)))
+            self.intermediate_indices = self.invert_documents(docs, 'intermediate_index_')
+
         self.save()
 
-        with InvertedIndexWriter(self.index_name, self.postings_encoding, directory = self.output_dir) as merged_index:
+        with InvertedIndexWriter(self.index_name, self.postings_encoding, directory = self.index_dir,
+                                 compact_dict = True, block_size = self.block_size) as merged_index:
             with contextlib.ExitStack() as stack:
-                indices = [stack.enter_context(InvertedIndexReader(index_id, self.postings_encoding, directory=self.output_dir))
+                indices = [stack.enter_context(InvertedIndexReader(index_id, self.postings_encoding, directory=self.index_dir))
                                for index_id in self.intermediate_indices]
                 self.merge(indices, merged_index)
 
+        self.build_term_statistics()
+        if self.impact_ordered:
+            self.build_impact_index()
+        if self.store_documents:
+            self.write_document_store(self.doc_store_path(), len(self.doc_id_map))
+        self.publish_generation(generation, self.index_dir)
+
+    def invert_blocks_parallel(self, block_dirs, workers):
+        """
+        Parsing dan inversion semua block dengan ProcessPoolExecutor.
+
+        1. docID ditentukan di process utama (berurutan per block), sehingga
+           docs.dict sama dengan indexing serial.
+        2. Setiap worker menulis intermediate_index_<block>_<i> (SPIMI,
+           lihat invert_documents) dengan termID lokal worker tersebut, dan
+           mengembalikan nama-nama index tersebut serta daftar term-nya.
+        3. Process utama memberi termID global dengan urutan block, lalu
+           worker menulis ulang setiap intermediate index dengan termID
+           global (remapping) sebelum merge.
+        """
+        tasks = []
+        for block_dir_relative in block_dirs:
+            files = sorted(os.listdir(os.path.join(self.data_dir, block_dir_relative)))
+            docs = [(self.doc_id_map[os.path.join(block_dir_relative, f)], os.path.join(block_dir_relative, f))
+                    for f in files]
+            tasks.append(('intermediate_index_' + block_dir_relative + '_', docs))
+
+        with ProcessPoolExecutor(max_workers = workers) as pool:
+            futures = [pool.submit(_invert_block, self.data_dir, self.index_dir, self.postings_encoding,
+                                   self.block_size, self.memory_budget, self.analyzer, index_prefix, docs)
+                       for index_prefix, docs in tasks]
+            results = [future.result() for future in tqdm(futures)]
+
+            futures = []
+            for index_ids, terms in results:
+                self.intermediate_indices.extend(index_ids)
+                term_ids = self.term_id_map.get_ids(terms)
+                # Block pertama selalu mendapat termID global yang sama
+                if term_ids != list(range(len(term_ids))):
+                    futures.extend(pool.submit(_remap_block, self.index_dir, self.postings_encoding, self.block_size,
+                                               index_id, term_ids)
+                                   for index_id in index_ids)
+            for future in futures:
+                future.result()
+
+
+def link_or_copy(source, destination):
+    """Hard link source ke destination, atau copy jika hard link tidak didukung"""
+    try:
+        os.link(source, destination)
+    except OSError:
+        shutil.copy2(source, destination)
+
+def _invert_block(data_dir, output_dir, postings_encoding, block_size, memory_budget, analyzer, index_prefix, docs):
+    """
+    Worker index(workers > 1): parsing dan inversion satu block dengan
+    termID lokal. Mengembalikan (nama-nama intermediate index, list of
+    term), dimana term ke-i mempunyai termID lokal i.
+    """
+    builder = BSBIIndex(data_dir, output_dir, postings_encoding, block_size = block_size,
+                        analyzer = analyzer, memory_budget = memory_budget)
+    index_ids = builder.invert_documents(docs, index_prefix)
+    return index_ids, builder.term_id_map.id_to_str
+
+def _remap_block(output_dir, postings_encoding, block_size, index_id, term_ids):
+    """
+    Worker index(workers > 1): menulis ulang intermediate index dengan
+    termID global term_ids[termID lokal], terurut berdasarkan termID global.
+    """
+    with InvertedIndexReader(index_id, postings_encoding, directory = output_dir) as reader:
+        postings = sorted((term_ids[term], postings_list, tf_list) for term, postings_list, tf_list in reader)
+    remapped_id = index_id + '.remap'
+    with InvertedIndexWriter(remapped_id, postings_encoding, directory = output_dir,
+                             compact_dict = True, block_size = block_size) as index:
+        for term, postings_list, tf_list in postings:
+            index.append(term, postings_list, tf_list)
+    for extension in InvertedIndexReader.EXTENSIONS:
+        os.replace(os.path.join(output_dir, remapped_id + extension), os.path.join(output_dir, index_id + extension))
+
 
 if __name__ == "__main__":
 
@@ -0,0 +1,127 @@
+import time
+import numpy as np
+
+from .features import features_batch, project
+
+class CascadeRanker:
+    """
+    Ranking bertahap dengan budget (banyaknya dokumen) dan batas waktu
+    (detik) di setiap tahap, sehingga latency query dengan banyak dokumen
+    yang cocok tetap terbatas:
+
+        1. first stage  : top first_stage_k dengan Block-Max WAND
+                          (BSBIIndex.wand_doc_ids, skor first_stage_scoring)
+        2. second stage : skor BM25 hanya untuk kandidat tahap pertama
+                          (BSBIIndex.score_bm25, memakai statistik term dan
+                          panjang dokumen yang sudah dihitung), diambil
+                          top second_stage_k
+        3. rerank       : LambdaMART hanya untuk top rerank_k, di-score per
+                          batch_size dokumen
+
+    Jika batas waktu sebuah tahap terlewati: tahap pertama mengembalikan
+    top-K dari dokumen yang sudah dievaluasi, tahap kedua dilewati (urutan
+    tahap pertama dipakai), dan rerank berhenti setelah batch terakhir
+    yang selesai (dokumen yang belum di-score tetap di bawah dengan urutan
+    tahap sebelumnya). Batas waktu None berarti tidak dibatasi. Setiap
+    tahap mengembalikan (docID, degraded), dengan degraded True jika tahap
+    tersebut (mungkin) berhenti karena batas waktunya; hasil seperti itu
+    tidak boleh di-cache (lihat SearchEngine.search).
+
+    Parameters
+    ----------
+    first_stage_k: int
+    first_stage_time: float atau None
+    first_stage_scoring: str
+        "tfidf", "tf_max_norm", atau "bm25" (lihat BSBIIndex.retrieve_wand)
+    second_stage_k: int atau None
+        None berarti tahap kedua tidak dipakai
+    second_stage_time: float atau None
+    rerank_k: int
+    rerank_time: float atau None
+    batch_size: int
+    """
+    def __init__(self, first_stage_k = 1000, first_stage_time = 0.2, first_stage_scoring = "tf_max_norm",
+                 second_stage_k = 200, second_stage_time = 0.1,
+                 rerank_k = 50, rerank_time = 0.3, batch_size = 25):
+        self.first_stage_k = first_stage_k
+        self.first_stage_time = first_stage_time
+        self.first_stage_scoring = first_stage_scoring
+        self.second_stage_k = second_stage_k
+        self.second_stage_time = second_stage_time
+        self.rerank_k = rerank_k
+        self.rerank_time = rerank_time
+        self.batch_size = batch_size
+
+    def config(self):
+        """Semua parameter, misalnya untuk key cache hasil (lihat resultcache)"""
+        return (self.first_stage_k, self.first_stage_time, self.first_stage_scoring,
+                self.second_stage_k, self.second_stage_time,
+                self.rerank_k, self.rerank_time, self.batch_size)
+
+    @staticmethod
+    def deadline(time_limit):
+        return None if time_limit is None else time.monotonic() + time_limit
+
+    def first_stage(self, bsbi, query, k):
+        """docID top max(k, first_stage_k) terurut mengecil berdasarkan skor"""
+        deadline = self.deadline(self.first_stage_time)
+        top = bsbi.wand_doc_ids(query, max(k, self.first_stage_k), self.first_stage_scoring,
+                                deadline = deadline)
+        # wand_top_k tidak melaporkan apakah evaluasi dihentikan; jika
+        # deadline sudah lewat, hasilnya dianggap mungkin terpotong
+        degraded = deadline is not None and time.monotonic() >= deadline
+        return [doc_id for _, doc_id in top], degraded
+
+    def second_stage(self, bsbi, query, doc_ids, k):
+        """doc_ids diurutkan ulang dengan BM25, diambil top max(k, second_stage_k)"""
+        if self.second_stage_k is None or not doc_ids:
+            return doc_ids, False
+        scores = bsbi.score_bm25(query, doc_ids, deadline = self.deadline(self.second_stage_time))
+        if scores is None:
+            return doc_ids, True
+        # sort stabil: skor sama tetap dengan urutan tahap pertama
+        order = np.argsort(-scores, kind='stable')[:max(k, self.second_stage_k)]
+        return [doc_ids[i] for i in order], False
+
+    def rerank(self, bsbi, rank_model, lsi_model, query, doc_ids, lsi_fingerprint = None):
+        """
+        Top rerank_k doc_ids diurutkan ulang dengan LambdaMART. Vektor LSI
+        dokumen offline hanya dipakai jika dihitung dengan model yang sidik
+        jarinya lsi_fingerprint (lihat features.lsi_fingerprint)
+        """
+        deadline = self.deadline(self.rerank_time)
+        candidates = doc_ids[:self.rerank_k]
+        terms = query.split()
+        offline_vectors = bsbi.doc_vectors
+        if offline_vectors is not None and not offline_vectors.matches(lsi_fingerprint):
+            offline_vectors = None
+        scored = []
+        for start in range(0, len(candidates), self.batch_size):
+            if scored and deadline is not None and time.monotonic() >= deadline:
+                break
+            batch = candidates[start:start + self.batch_size]
+            docs = [bsbi.document_text(doc_id).lower().split() for doc_id in batch]
+            # Vektor LSI dokumen dibaca dari matriks yang dihitung offline
+            # (lihat BSBIIndex.build_doc_vectors); hanya dokumen yang belum
+            # ada di matriks yang diproyeksikan online
+            doc_vectors = None
+            if offline_vectors is not None:
+                doc_vectors, missing = offline_vectors.rows(batch)
+                if missing.any():
+                    doc_vectors[missing] = project([docs[i] for i in np.flatnonzero(missing)], lsi_model)
+            pred_score = rank_model.predict(features_batch(terms, docs, lsi_model, doc_vectors = doc_vectors))
+            scored.extend(zip(batch, pred_score))
+        degraded = len(scored) < len(candidates)
+        scored = sorted(scored, key=lambda tup: tup[1], reverse=True)
+        return [doc_id for doc_id, _ in scored] + doc_ids[len(scored):], degraded
+
+    def rank(self, bsbi, rank_model, lsi_model, query, k = 10, lsi_fingerprint = None):
+        """
+        Menjalankan ketiga tahap; mengembalikan (docID top-k terurut,
+        degraded), dengan degraded True jika ada tahap yang berhenti karena
+        batas waktunya
+        """
+        doc_ids, first_degraded = self.first_stage(bsbi, query, k)
+        doc_ids, second_degraded = self.second_stage(bsbi, query, doc_ids, k)
+        doc_ids, rerank_degraded = self.rerank(bsbi, rank_model, lsi_model, query, doc_ids, lsi_fingerprint)
+        return doc_ids[:k], first_degraded or second_degraded or rerank_degraded
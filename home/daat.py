@@ -0,0 +1,211 @@
+import heapq
+import math
+import time
+
+from .index import PostingsCursor
+
+# Banyaknya iterasi wand_top_k antar pengecekan deadline
+DEADLINE_CHECK_INTERVAL = 256
+
+class TfIdfScoring:
+    """
+    w(t, D) = 1 + log tf(t, D), w(t, Q) = log (N / df(t)); sama dengan
+    BSBIIndex.retrieve_tfidf
+    """
+    def __init__(self, n):
+        self.n = n
+
+    def term_weight(self, df):
+        return math.log(self.n / df)
+
+    def doc_weight(self, tf, doc_id, max_tf):
+        return 1 + math.log(tf) if tf > 0 else 0
+
+    def doc_weight_bound(self, tf, max_tf):
+        """Batas atas w(t, D) untuk semua posting dengan TF <= tf"""
+        return 1 + math.log(tf) if tf > 0 else 0
+
+class TfMaxNormScoring:
+    """
+    w(t, D) = 0.5 + 0.5 * tf(t, D) / max(tf(t, D)),
+    w(t, Q) = log (N / (1 + df(t))) + 1; sama dengan
+    BSBIIndex.retrieve_0_5_tf_max_norm_smooth_idf
+    """
+    def __init__(self, n):
+        self.n = n
+
+    def term_weight(self, df):
+        return math.log(self.n / (1 + df)) + 1
+
+    def doc_weight(self, tf, doc_id, max_tf):
+        return 0.5 + 0.5 * tf / max_tf
+
+    def doc_weight_bound(self, tf, max_tf):
+        return 0.5 + 0.5 * tf / max_tf
+
+class BM25Scoring:
+    """
+    w(t, D) = ((k1 + 1) * tf) / (k1 * ((1 - b) + b * dl / avdl) + tf),
+    w(t, Q) = log (N / df(t)); sama dengan BSBIIndex.retrieve_bm25
+    """
+    def __init__(self, n, doc_length, avg_doc_length, k1 = 1.5, b = 0.7):
+        self.n = n
+        self.doc_length = doc_length
+        self.avg_doc_length = avg_doc_length
+        self.k1 = k1
+        self.b = b
+
+    def term_weight(self, df):
+        return math.log(self.n / df)
+
+    def doc_weight(self, tf, doc_id, max_tf):
+        norm = self.k1 * ((1 - self.b) + (self.b * self.doc_length[doc_id] / self.avg_doc_length))
+        return ((self.k1 + 1) * tf) / (norm + tf)
+
+    def doc_weight_bound(self, tf, max_tf):
+        # w(t, D) naik terhadap tf dan turun terhadap panjang dokumen,
+        # sehingga batas atasnya dicapai saat panjang dokumen 0
+        return ((self.k1 + 1) * tf) / (self.k1 * (1 - self.b) + tf)
+
+
+def wand_top_k(cursors, scoring, k, deleted = None, deadline = None):
+    """
+    Document-at-a-Time top-K retrieval dengan Block-Max WAND.
+
+    Setiap cursor (PostingsCursor) harus sudah diberi atribut weight, yaitu
+    w(t, Q) dikali banyaknya kemunculan term di query. Batas atas skor
+    sebuah term adalah atribut upper_bound jika sudah diberikan (misalnya
+    TermStatistics.bm25_ub), atau weight * doc_weight_bound(max_tf); dokumen hanya
+    di-score penuh jika jumlah batas atas term-term yang mungkin memuatnya
+    melebihi threshold (skor terkecil di heap top-K). Batas atas per block
+    (block-max TF) dipakai untuk melompati block yang tidak mungkin masuk
+    top-K tanpa decoding.
+
+    Untuk skor yang tidak negatif, hasilnya sama dengan evaluasi
+    exhaustive Term-at-a-Time (kecuali urutan dokumen dengan skor sama).
+    Dokumen yang ada di deleted (DeletionBitmap) dilewati tanpa di-score.
+
+    Jika deadline (nilai time.monotonic()) terlewati, evaluasi berhenti dan
+    top-K dari dokumen yang sudah dievaluasi (docID lebih kecil dari posisi
+    cursor) yang dikembalikan.
+
+    Returns
+    -------
+    List[(float, int)]
+        List of (score, docID) terurut mengecil berdasarkan skor
+    """
+    for cursor in cursors:
+        if getattr(cursor, 'upper_bound', None) is None:
+            cursor.upper_bound = cursor.weight * scoring.doc_weight_bound(cursor.max_tf, cursor.max_tf)
+    cursors = [cursor for cursor in cursors if cursor.doc != PostingsCursor.END]
+    heap = []
+    steps = 0
+    while cursors:
+        steps += 1
+        if deadline is not None and steps % DEADLINE_CHECK_INTERVAL == 0 and time.monotonic() >= deadline:
+            break
+        cursors.sort(key=lambda cursor: cursor.doc)
+        threshold = heap[0][0] if len(heap) >= k else -1
+
+        # Cari pivot: cursor pertama dimana jumlah batas atas melebihi threshold
+        accumulated = 0
+        pivot = None
+        for i, cursor in enumerate(cursors):
+            accumulated += cursor.upper_bound
+            if accumulated > threshold:
+                pivot = i
+                break
+        if pivot is None:
+            break
+        pivot_doc = cursors[pivot].doc
+        while pivot + 1 < len(cursors) and cursors[pivot + 1].doc == pivot_doc:
+            pivot += 1
+
+        # Cek batas atas di level block untuk pivot_doc
+        if threshold >= 0:
+            block_bound = sum(cursor.weight * scoring.doc_weight_bound(cursor.block_max_tf(pivot_doc), cursor.max_tf)
+                              for cursor in cursors[:pivot + 1])
+            if block_bound <= threshold:
+                target = min(cursor.block_last_doc(pivot_doc) for cursor in cursors[:pivot + 1]) + 1
+                if pivot + 1 < len(cursors):
+                    target = min(target, cursors[pivot + 1].doc)
+                for cursor in cursors[:pivot + 1]:
+                    cursor.next_geq(target)
+                cursors = [cursor for cursor in cursors if cursor.doc != PostingsCursor.END]
+                continue
+
+        if cursors[0].doc == pivot_doc and deleted and pivot_doc in deleted:
+            for cursor in cursors[:pivot + 1]:
+                cursor.next()
+        elif cursors[0].doc == pivot_doc:
+            score = 0
+            for cursor in cursors[:pivot + 1]:
+                score += cursor.weight * scoring.doc_weight(cursor.tf, pivot_doc, cursor.max_tf)
+                cursor.next()
+            if len(heap) < k:
+                heapq.heappush(heap, (score, pivot_doc))
+            elif score > heap[0][0]:
+                heapq.heapreplace(heap, (score, pivot_doc))
+        else:
+            for cursor in cursors[:pivot]:
+                cursor.next_geq(pivot_doc)
+        cursors = [cursor for cursor in cursors if cursor.doc != PostingsCursor.END]
+    return sorted(heap, key=lambda x: x[0], reverse=True)
+
+
+if __name__ == "__main__":
+
+    import os
+    import random
+    import tempfile
+    # dijalankan sebagai module: python -m home.daat
+    from .bsbi import BSBIIndex
+    from .analysis import Analyzer
+    from .compression import VBEPostings
+
+    def top_scores(results):
+        return [round(score, 9) for score, _ in results]
+
+    def check(index, queries, message):
+        for query in queries:
+            for scoring, exhaustive in [("tfidf", index.retrieve_tfidf), ("bm25", index.retrieve_bm25),
+                                        ("tf_max_norm", index.retrieve_0_5_tf_max_norm_smooth_idf)]:
+                assert top_scores(index.retrieve_wand(query, 10, scoring)) == top_scores(exhaustive(query, 10)), \
+                    (message, scoring, query)
+
+    random.seed(0)
+    words = ["w%d" % i for i in range(40)]
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        data_dir, output_dir = os.path.join(tmp_dir, 'collection'), os.path.join(tmp_dir, 'index')
+        os.makedirs(output_dir)
+        doc_paths = []
+        for block in range(2):
+            os.makedirs(os.path.join(data_dir, str(block)))
+            for doc in range(40):
+                # w0 muncul di hampir semua dokumen (df besar)
+                text = ' '.join(['w0'] + [random.choice(words) for _ in range(random.randint(3, 30))])
+                with open(os.path.join(data_dir, str(block), '%d.txt' % doc), 'w') as f:
+                    f.write(text)
+                doc_paths.append('%d/%d.txt' % (block, doc))
+        index = BSBIIndex(data_dir, output_dir, VBEPostings, analyzer = Analyzer(stopwords = []), block_size = 4)
+        index.index()
+        index.load()
+        queries = ['w0 w1 w2', 'w0', 'w3 w0 w0', 'w5 w6 w7 w8'] + \
+                  [' '.join(random.choice(words) for _ in range(3)) for _ in range(30)]
+        check(index, queries, "index lengkap")
+
+        # hampir semua dokumen dihapus: df (termasuk postings dokumen yang
+        # belum dibuang) bisa lebih besar dari banyaknya dokumen hidup
+        index.delete_documents(random.sample(doc_paths, 70))
+        # instance lain memuat index (dan statistik term) setelah delete
+        reader = BSBIIndex(data_dir, output_dir, VBEPostings, analyzer = Analyzer(stopwords = []), block_size = 4)
+        reader.load()
+        assert reader.document_count() == len(doc_paths), "N harus mencakup dokumen yang belum di-compact"
+        check(index, queries, "setelah delete")
+        check(reader, queries, "setelah delete (load ulang)")
+        reader.close()
+
+        assert index.compact()
+        index.refresh()
+        assert index.document_count() == 10, "N setelah compact salah"
+        check(index, queries, "setelah compact")
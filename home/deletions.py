@@ -0,0 +1,95 @@
+import os
+import numpy as np
+
+class DeletionBitmap:
+    """
+    Tombstone dokumen yang dihapus (atau di-update, sehingga docID lamanya
+    mati), disimpan sebagai bitmap dengan bit ke-docID bernilai 1 jika
+    dokumen tersebut sudah dihapus. Query processing cukup melakukan satu
+    bit test per kandidat; postings milik dokumen yang dihapus baru dibuang
+    secara fisik saat merge berikutnya (lihat merge.merge_indices).
+
+    docID tidak pernah dipakai ulang, sehingga bitmap tetap valid (dan
+    tetap disimpan) setelah postings-nya dibuang.
+
+    Disimpan di <index_name>.deleted: byte ke-i memuat docID 8i .. 8i+7,
+    bit ke-(docID % 8) (little-endian bit order).
+    """
+    def __init__(self, path = None):
+        self.path = path
+        self.bits = bytearray()
+        self.mtime = None
+        if path is not None and os.path.exists(path):
+            with open(path, 'rb') as f:
+                self.bits = bytearray(f.read())
+            self.mtime = os.path.getmtime(path)
+        self.count = int(np.unpackbits(np.frombuffer(self.bits, dtype=np.uint8)).sum()) if self.bits else 0
+        self.sorted_ids = None
+
+    def __contains__(self, doc_id):
+        byte = doc_id >> 3
+        return byte < len(self.bits) and (self.bits[byte] >> (doc_id & 7)) & 1 == 1
+
+    def __len__(self):
+        return self.count
+
+    def __bool__(self):
+        return self.count > 0
+
+    def add(self, doc_id):
+        """Menandai doc_id sebagai dihapus; mengembalikan False jika sudah ditandai"""
+        if doc_id in self:
+            return False
+        byte = doc_id >> 3
+        if byte >= len(self.bits):
+            self.bits.extend(bytes(byte + 1 - len(self.bits)))
+        self.bits[byte] |= 1 << (doc_id & 7)
+        self.count += 1
+        self.sorted_ids = None
+        return True
+
+    def doc_ids(self):
+        """Semua docID yang dihapus, terurut menaik (numpy array)"""
+        if self.sorted_ids is None:
+            self.sorted_ids = np.flatnonzero(np.unpackbits(np.frombuffer(self.bits, dtype=np.uint8), bitorder='little'))
+        return self.sorted_ids
+
+    def count_between(self, lo, hi):
+        """Banyaknya docID yang dihapus di rentang [lo, hi]"""
+        doc_ids = self.doc_ids()
+        return int(np.searchsorted(doc_ids, hi, side='right') - np.searchsorted(doc_ids, lo, side='left'))
+
+    def changed_on_disk(self):
+        """Apakah file bitmap sudah diubah (oleh proses lain) sejak dimuat"""
+        mtime = os.path.getmtime(self.path) if self.path is not None and os.path.exists(self.path) else None
+        return mtime != self.mtime
+
+    def save(self, path = None):
+        """Menyimpan bitmap (ditulis ke file sementara lalu di-rename)"""
+        path = path or self.path
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(self.bits)
+        os.replace(tmp_path, path)
+        if path == self.path:
+            self.mtime = os.path.getmtime(path)
+
+
+if __name__ == "__main__":
+
+    import tempfile
+
+    deleted = DeletionBitmap()
+    assert not deleted and 3 not in deleted, "bitmap kosong salah"
+    assert deleted.add(3) and deleted.add(17) and not deleted.add(3), "add salah"
+    assert 3 in deleted and 17 in deleted and 4 not in deleted and 1000 not in deleted, "bit test salah"
+    assert len(deleted) == 2 and deleted.doc_ids().tolist() == [3, 17], "doc_ids salah"
+    assert deleted.count_between(0, 3) == 1 and deleted.count_between(4, 16) == 0 and deleted.count_between(3, 17) == 2, \
+        "count_between salah"
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, 'test.deleted')
+        deleted.save(path)
+        loaded = DeletionBitmap(path)
+        assert len(loaded) == 2 and 17 in loaded and 16 not in loaded, "save/load salah"
+        assert not loaded.changed_on_disk(), "changed_on_disk salah"
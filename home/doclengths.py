@@ -0,0 +1,150 @@
+import os
+import json
+import numpy as np
+
+class DocLengths:
+    """
+    Panjang dokumen (banyaknya token) sebuah index dalam bentuk kolom:
+    array uint32 yang diindeks dengan docID - base, dimana 0 berarti
+    dokumen tidak ada di index. Disimpan terpisah dari metadata index:
+
+        <index_name>.doclen.npy      : array panjang dokumen (dibaca dengan mmap)
+        <index_name>.collection.json : base, n (banyaknya dokumen),
+                                       total_tokens, dan avg_doc_length
+
+    Interface-nya sama dengan dictionary docID -> panjang yang sebelumnya
+    dipakai (doc_length[doc_id], in, len, items), ditambah take untuk
+    mengambil panjang banyak dokumen sekaligus (vectorized BM25).
+    """
+    def __init__(self, lengths, base = 0, stats = None):
+        self.lengths = lengths
+        self.base = base
+        if stats is None:
+            total_tokens = int(lengths.sum(dtype=np.uint64))
+            n = int(np.count_nonzero(lengths))
+            stats = {'n': n, 'total_tokens': total_tokens, 'avg_doc_length': total_tokens / n if n else 0}
+        self.n = stats['n']
+        self.total_tokens = stats['total_tokens']
+        self.avg_doc_length = stats['avg_doc_length']
+
+    @classmethod
+    def from_dict(cls, doc_length):
+        """DocLengths dari dictionary docID -> panjang dokumen"""
+        if not doc_length:
+            return cls(np.zeros(0, dtype=np.uint32))
+        base = min(doc_length)
+        lengths = np.zeros(max(doc_length) - base + 1, dtype=np.uint32)
+        lengths[np.fromiter(doc_length.keys(), dtype=np.int64, count=len(doc_length)) - base] = \
+            np.fromiter(doc_length.values(), dtype=np.int64, count=len(doc_length))
+        return cls(lengths, base)
+
+    @classmethod
+    def combine(cls, doc_lengths):
+        """Jumlah panjang dokumen beberapa DocLengths (misalnya saat merge)"""
+        doc_lengths = [doc_length for doc_length in doc_lengths if doc_length.lengths.size > 0]
+        if not doc_lengths:
+            return cls(np.zeros(0, dtype=np.uint32))
+        base = min(doc_length.base for doc_length in doc_lengths)
+        end = max(doc_length.base + doc_length.lengths.size for doc_length in doc_lengths)
+        lengths = np.zeros(end - base, dtype=np.uint32)
+        for doc_length in doc_lengths:
+            start = doc_length.base - base
+            lengths[start:start + doc_length.lengths.size] += doc_length.lengths
+        return cls(lengths, base)
+
+    @staticmethod
+    def paths(directory, index_name):
+        return (os.path.join(directory, index_name + '.doclen.npy'),
+                os.path.join(directory, index_name + '.collection.json'))
+
+    @classmethod
+    def exists(cls, directory, index_name):
+        return all(os.path.exists(path) for path in cls.paths(directory, index_name))
+
+    @classmethod
+    def load(cls, directory, index_name):
+        """Memuat DocLengths yang disimpan dengan save; array dibaca dengan mmap"""
+        lengths_path, stats_path = cls.paths(directory, index_name)
+        with open(stats_path) as f:
+            stats = json.load(f)
+        # np.load tidak bisa mmap file dengan array kosong
+        if stats['n'] == 0:
+            lengths = np.zeros(0, dtype=np.uint32)
+        else:
+            lengths = np.load(lengths_path, mmap_mode='r')
+        return cls(lengths, stats['base'], stats)
+
+    def save(self, directory, index_name):
+        lengths_path, stats_path = self.paths(directory, index_name)
+        np.save(lengths_path, np.ascontiguousarray(self.lengths, dtype=np.uint32))
+        with open(stats_path, 'w') as f:
+            json.dump({'base': self.base, 'n': self.n, 'total_tokens': self.total_tokens,
+                       'avg_doc_length': self.avg_doc_length}, f)
+
+    def without(self, doc_ids):
+        """Salinan tanpa dokumen doc_ids (array docID terurut, lihat DeletionBitmap.doc_ids)"""
+        lengths = np.array(self.lengths, dtype=np.uint32)
+        doc_ids = np.asarray(doc_ids, dtype=np.int64) - self.base
+        lengths[doc_ids[(doc_ids >= 0) & (doc_ids < lengths.size)]] = 0
+        return DocLengths(lengths, self.base)
+
+    def take(self, doc_ids):
+        """Panjang dokumen untuk array docID (semuanya harus ada di index)"""
+        return self.lengths[np.asarray(doc_ids, dtype=np.int64) - self.base]
+
+    def __getitem__(self, doc_id):
+        i = doc_id - self.base
+        if not 0 <= i < self.lengths.size or self.lengths[i] == 0:
+            raise KeyError(doc_id)
+        return int(self.lengths[i])
+
+    def get(self, doc_id, default = None):
+        return self[doc_id] if doc_id in self else default
+
+    def __contains__(self, doc_id):
+        i = doc_id - self.base
+        return 0 <= i < self.lengths.size and self.lengths[i] != 0
+
+    def __len__(self):
+        return self.n
+
+    def keys(self):
+        return (np.flatnonzero(self.lengths) + self.base).tolist()
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def values(self):
+        return self.lengths[self.lengths != 0].tolist()
+
+    def items(self):
+        return zip(self.keys(), self.values())
+
+
+if __name__ == "__main__":
+
+    import tempfile
+
+    doc_length = DocLengths.from_dict({12: 3, 10: 5, 15: 1})
+    assert doc_length.base == 10 and doc_length.lengths.tolist() == [5, 0, 3, 0, 0, 1], "from_dict salah"
+    assert len(doc_length) == 3 and doc_length.total_tokens == 9 and doc_length.avg_doc_length == 3, "statistik salah"
+    assert doc_length[12] == 3 and 11 not in doc_length and 9 not in doc_length and 16 not in doc_length, "lookup salah"
+    assert dict(doc_length.items()) == {10: 5, 12: 3, 15: 1}, "items salah"
+    assert doc_length.take([15, 10]).tolist() == [1, 5], "take salah"
+    try:
+        doc_length[11]
+        assert False, "docID yang tidak ada harus KeyError"
+    except KeyError:
+        pass
+
+    total = DocLengths.combine([doc_length, DocLengths.from_dict({3: 2, 12: 4}), DocLengths.from_dict({})])
+    assert dict(total.items()) == {3: 2, 10: 5, 12: 7, 15: 1}, "combine salah"
+    assert dict(total.without([3, 15, 99]).items()) == {10: 5, 12: 7}, "without salah"
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        doc_length.save(tmp_dir, 'test')
+        loaded = DocLengths.load(tmp_dir, 'test')
+        assert isinstance(loaded.lengths, np.memmap), "harus di-mmap"
+        assert dict(loaded.items()) == dict(doc_length.items()) and loaded.avg_doc_length == 3, "save/load salah"
+        DocLengths.from_dict({}).save(tmp_dir, 'empty')
+        assert len(DocLengths.load(tmp_dir, 'empty')) == 0, "save/load kosong salah"
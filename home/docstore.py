@@ -0,0 +1,127 @@
+import os
+import mmap
+import zlib
+import struct
+import functools
+import numpy as np
+
+class DocumentStore:
+    """
+    Teks semua dokumen dalam satu file <index_name>.docs: setiap dokumen
+    dikompresi (zlib) secara independen lalu disambung, dengan tabel offset
+    yang diindeks docID. File di-mmap, sehingga membaca banyak dokumen
+    (snippet halaman hasil, input reranker) tidak membuka satu file per
+    dokumen. Dokumen yang sering dibaca di-cache (LRU) dalam bentuk teks.
+
+    Layout file (little-endian):
+        header  : magic b'DOCS', version (uint32), n (uint64)
+        offsets : (n + 1) x uint64, dokumen ke-i adalah blob[offsets[i]:offsets[i+1]]
+        blob    : semua dokumen (UTF-8, zlib) disambung
+
+    Dokumen dengan panjang 0 tidak ada di store (misalnya dihapus, atau
+    ditambahkan setelah store dibangun).
+
+    Parameters
+    ----------
+    path: str
+    cache_size: int
+        Banyaknya dokumen maksimum di cache
+    """
+    MAGIC = b'DOCS'
+    VERSION = 1
+    HEADER = struct.Struct('<4sIQ')
+
+    def __init__(self, path, cache_size = 1024):
+        self.path = path
+        with open(path, 'rb') as f:
+            self.mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, n = self.HEADER.unpack_from(self.mmap, 0)
+        if magic != self.MAGIC or version != self.VERSION:
+            raise ValueError("bukan file DocumentStore yang valid")
+        self.n = n
+        self.offsets = np.frombuffer(self.mmap, dtype='<u8', count=n + 1, offset=self.HEADER.size)
+        self.blob_start = self.HEADER.size + 8 * (n + 1)
+        self.get = functools.lru_cache(maxsize=cache_size)(self.read)
+
+    @staticmethod
+    def path_for(directory, index_name):
+        return os.path.join(directory, index_name + '.docs')
+
+    def __len__(self):
+        return self.n
+
+    def raw(self, doc_id):
+        """Bytes terkompresi dokumen doc_id (b'' jika tidak ada)"""
+        if not 0 <= doc_id < self.n:
+            return b''
+        start, end = int(self.offsets[doc_id]), int(self.offsets[doc_id + 1])
+        return self.mmap[self.blob_start + start:self.blob_start + end]
+
+    def read(self, doc_id):
+        """Teks dokumen doc_id tanpa cache, atau None jika tidak ada di store"""
+        raw = self.raw(doc_id)
+        if not raw:
+            return None
+        return zlib.decompress(raw).decode('utf-8')
+
+    def cache_info(self):
+        return self.get.cache_info()
+
+    def close(self):
+        self.get.cache_clear()
+        self.offsets = None
+        self.mmap.close()
+
+    @staticmethod
+    def compress(text, level = 6):
+        return zlib.compress(text.encode('utf-8'), level)
+
+    @classmethod
+    def write(cls, path, n_docs, blobs):
+        """
+        Menulis store dengan n_docs dokumen dari blobs, iterable of (docID,
+        bytes terkompresi; lihat compress dan raw) dengan docID menaik.
+        Ditulis ke file sementara lalu di-rename.
+        """
+        offsets = np.zeros(n_docs + 1, dtype='<u8')
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(cls.HEADER.pack(cls.MAGIC, cls.VERSION, n_docs))
+            # tabel offset ditulis ulang setelah semua blob ditulis
+            f.write(offsets.tobytes())
+            position = 0
+            last_doc = -1
+            for doc_id, blob in blobs:
+                offsets[last_doc + 1:doc_id + 1] = position
+                f.write(blob)
+                position += len(blob)
+                last_doc = doc_id
+            offsets[last_doc + 1:] = position
+            f.seek(cls.HEADER.size)
+            f.write(offsets.tobytes())
+        os.replace(tmp_path, path)
+
+
+if __name__ == "__main__":
+
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = DocumentStore.path_for(tmp_dir, 'main_index')
+        texts = {0: "dokumen pertama", 2: u"café " * 100, 3: ""}
+        DocumentStore.write(path, 5, ((doc_id, DocumentStore.compress(text)) for doc_id, text in sorted(texts.items())))
+        store = DocumentStore(path, cache_size = 2)
+        assert len(store) == 5, "n salah"
+        assert [store.get(doc_id) for doc_id in range(5)] == ["dokumen pertama", None, u"café " * 100, "", None], \
+            "get salah"
+        assert store.get(7) is None and store.raw(1) == b'', "dokumen yang tidak ada salah"
+        hits = store.cache_info().hits
+        store.get(4)
+        assert store.cache_info().hits == hits + 1, "cache salah"
+
+        copy_path = DocumentStore.path_for(tmp_dir, 'copy')
+        DocumentStore.write(copy_path, 6, [(0, store.raw(0)), (5, DocumentStore.compress("baru"))])
+        copy = DocumentStore(copy_path)
+        assert copy.get(0) == "dokumen pertama" and copy.get(2) is None and copy.get(5) == "baru", "salin raw salah"
+        copy.close()
+        store.close()
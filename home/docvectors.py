@@ -0,0 +1,90 @@
+import os
+import json
+import numpy as np
+
+class DocVectors:
+    """
+    Vektor LSI semua dokumen yang dihitung offline (lihat
+    BSBIIndex.build_doc_vectors), disimpan sebagai matriks float32
+    <index_name>.lsi.npy dengan baris ke-i adalah vektor dokumen docID i,
+    dan dibaca dengan mmap saat serving. Reranking cukup memproyeksikan
+    query; hanya dokumen yang ditambahkan setelah matriks dibangun (docID
+    di luar matriks, misalnya dari delta segment) yang diproyeksikan online.
+
+    Sidik jari model LSI yang menghasilkan matriks (lihat
+    features.lsi_fingerprint) disimpan di <index_name>.lsi.json; matriks
+    hanya boleh dipakai dengan model yang sidik jarinya sama (lihat matches).
+    """
+    def __init__(self, path):
+        self.path = path
+        self.matrix = np.load(path, mmap_mode='r')
+        self.fingerprint = None
+        if os.path.exists(self.metadata_path(path)):
+            with open(self.metadata_path(path)) as f:
+                self.fingerprint = json.load(f)['model']
+
+    @staticmethod
+    def path_for(directory, index_name):
+        return os.path.join(directory, index_name + '.lsi.npy')
+
+    @staticmethod
+    def metadata_path(path):
+        return path[:-len('.npy')] + '.json'
+
+    def matches(self, fingerprint):
+        """Apakah matriks dihitung dengan model yang sidik jarinya fingerprint"""
+        return self.fingerprint is not None and self.fingerprint == fingerprint
+
+    def __len__(self):
+        return self.matrix.shape[0]
+
+    def rows(self, doc_ids):
+        """
+        Vektor (float64) untuk doc_ids, dan mask dokumen yang tidak ada di
+        matriks (barisnya bernilai nol dan harus diproyeksikan online)
+        """
+        doc_ids = np.asarray(doc_ids, dtype=np.int64)
+        missing = doc_ids >= self.matrix.shape[0]
+        vectors = np.zeros((doc_ids.size, self.matrix.shape[1]))
+        vectors[~missing] = self.matrix[doc_ids[~missing]]
+        return vectors, missing
+
+    @classmethod
+    def build(cls, path, n_docs, dimension, batches, fingerprint = None):
+        """
+        Menulis matriks n_docs x dimension dari batches, iterable of
+        (docID pertama, matriks vektor dokumen-dokumen berikutnya), beserta
+        sidik jari model yang menghasilkannya. Ditulis ke file sementara
+        lalu di-rename.
+        """
+        tmp_path = path + '.tmp'
+        matrix = np.lib.format.open_memmap(tmp_path, mode='w+', dtype=np.float32, shape=(n_docs, dimension))
+        for start, vectors in batches:
+            matrix[start:start + len(vectors)] = vectors
+        matrix.flush()
+        del matrix
+        # metadata ditulis dulu: matriks baru tidak pernah terlihat dengan
+        # sidik jari model lama
+        metadata_tmp_path = cls.metadata_path(path) + '.tmp'
+        with open(metadata_tmp_path, 'w') as f:
+            json.dump({'model': fingerprint}, f)
+        if os.path.exists(path):
+            os.remove(path)
+        os.replace(metadata_tmp_path, cls.metadata_path(path))
+        os.replace(tmp_path, path)
+
+
+if __name__ == "__main__":
+
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = DocVectors.path_for(tmp_dir, 'main_index')
+        batches = [(0, np.array([[1., 2.], [3., 4.]])), (2, np.array([[5., 6.]]))]
+        DocVectors.build(path, 3, 2, batches, fingerprint = 'abc')
+        doc_vectors = DocVectors(path)
+        assert len(doc_vectors) == 3 and doc_vectors.matrix.dtype == np.float32, "build salah"
+        assert doc_vectors.matches('abc') and not doc_vectors.matches('def'), "fingerprint salah"
+        vectors, missing = doc_vectors.rows([2, 5, 0])
+        assert vectors.tolist() == [[5., 6.], [0., 0.], [1., 2.]] and missing.tolist() == [False, True, False], \
+            "rows salah"
@@ -0,0 +1,175 @@
+import os
+import sys
+import pickle
+import hashlib
+import time
+import threading
+from .bsbi import BSBIIndex
+from .compression import VectorizedVBEPostings
+from .cascade import CascadeRanker
+from .resultcache import ResultCache
+from .features import lsi_fingerprint
+
+class SearchEngine:
+    """
+    Searcher yang hidup selama proses (satu per worker gunicorn). Ranker
+    LambdaMART, model LSI, IdMap, dan postings dictionary dimuat sekali saja
+    lalu tetap resident di memori, sehingga setiap request tidak perlu
+    melakukan unpickle ulang.
+
+    Attributes
+    ----------
+    base_dir(str): Path ke direktori app (tempat collection, index, dan modelletor)
+    rank_model: Model LambdaMART (LightGBM) untuk reranking
+    lsi_model: Model LSI untuk fitur reranking
+    lsi_fingerprint(str): Sidik jari lsi_model (lihat features.lsi_fingerprint);
+                    vektor dokumen offline hanya dipakai jika cocok
+    model_fingerprint(str): Hash isi file kedua model, bagian dari key cache hasil
+    bsbi(BSBIIndex): Index yang sudah dimuat
+    check_interval(float): Selang waktu minimum (detik) antar pengecekan
+                    generation index di disk (lihat refresh_index)
+    cascade(CascadeRanker): Budget dan batas waktu setiap tahap ranking
+    result_cache(ResultCache): Cache hasil search (lihat cache_stats)
+    """
+    def __init__(self, base_dir = None, rank_model_name = "model3", lsi_model_name = "model_lsi1",
+                 check_interval = 1.0, cascade = None, result_cache = None):
+        self.base_dir = base_dir or os.path.dirname(__file__)
+        self.rank_model_name = rank_model_name
+        self.lsi_model_name = lsi_model_name
+        self.rank_model = None
+        self.lsi_model = None
+        self.lsi_fingerprint = None
+        self.model_fingerprint = None
+        self.bsbi = None
+        self.lock = threading.Lock()
+        self.check_interval = check_interval
+        self.cascade = cascade or CascadeRanker()
+        self.result_cache = result_cache or ResultCache()
+        self.last_check = time.monotonic()
+
+        # IdMap di terms.dict dan docs.dict di-pickle sebagai modul "util"
+        if self.base_dir not in sys.path:
+            sys.path.append(self.base_dir)
+        self.reload()
+
+    def load_model(self, name):
+        """Model name beserta hash (SHA-1) isi file pickle-nya"""
+        with open(os.path.join(self.base_dir, 'modelletor', name + '.pkl'), 'rb') as f:
+            data = f.read()
+        return pickle.loads(data), hashlib.sha1(data).hexdigest()
+
+    def reload(self):
+        """
+        Memuat ulang model dan index dari disk. Panggil method ini setelah
+        index dibangun ulang dengan BSBIIndex.index().
+        """
+        rank_model, rank_digest = self.load_model(self.rank_model_name)
+        lsi_model, lsi_digest = self.load_model(self.lsi_model_name)
+        fingerprint = lsi_fingerprint(lsi_model)
+        bsbi = self.load_index()
+        # Instance lama tidak ditutup di sini karena mungkin masih dipakai
+        # oleh request lain; file-nya tertutup saat tidak lagi direferensikan
+        with self.lock:
+            self.rank_model, self.lsi_model, self.bsbi = rank_model, lsi_model, bsbi
+            self.lsi_fingerprint = fingerprint
+            self.model_fingerprint = rank_digest + lsi_digest
+        # Entri lama tidak akan cocok lagi (sidik jari model ada di key);
+        # cache lokal dikosongkan untuk membebaskan memori
+        self.result_cache.clear()
+
+    def load_index(self):
+        bsbi = BSBIIndex(data_dir=os.path.join(self.base_dir, 'collection'),
+                         postings_encoding=VectorizedVBEPostings,
+                         output_dir=os.path.join(self.base_dir, 'index'))
+        bsbi.load()
+        return bsbi
+
+    def refresh_index(self):
+        """
+        Jika generation index di disk sudah berganti (index dibangun ulang,
+        di-compact, atau ada dokumen baru/di-update), muat generation baru lalu tukar instance BSBIIndex
+        tanpa restart. Pengecekan (membaca manifest) dilakukan paling sering
+        sekali setiap check_interval detik; pada pengecekan yang sama,
+        deletion bitmap dimuat ulang jika ada dokumen yang baru dihapus.
+        Mengembalikan True jika index ditukar.
+        """
+        now = time.monotonic()
+        if now - self.last_check < self.check_interval:
+            return False
+        self.last_check = now
+        bsbi = self.bsbi
+        if bsbi.current_generation() == bsbi.generation:
+            bsbi.refresh_deletions()
+            return False
+        new_bsbi = self.load_index()
+        with self.lock:
+            if self.bsbi is bsbi:
+                self.bsbi = new_bsbi
+        return True
+
+    def search(self, query, k = 10):
+        """
+        Cascade ranking (lihat cascade.CascadeRanker): top-K dengan WAND
+        (TF max-norm + smooth IDF), BM25 untuk kandidatnya, lalu rerank
+        top-N dengan LambdaMART. Mengembalikan list k path dokumen relatif
+        terhadap collection (misal "1/10.txt"), atau None jika tidak ada hasil.
+
+        Hasil di-cache (lihat resultcache.ResultCache) dengan key term query
+        hasil analisis, sehingga query dengan term yang sama (misalnya hanya
+        berbeda huruf besar atau stopword) mendapat hasil yang sama walaupun
+        fitur LambdaMART dihitung dari token query mentah. Key memuat sidik
+        jari model dan versi index, sehingga entri di cache bersama tidak
+        terpakai lagi setelah model atau index berganti. Hasil yang
+        terdegradasi karena batas waktu cascade tidak di-cache.
+        """
+        self.refresh_index()
+        with self.lock:
+            rank_model, lsi_model, bsbi = self.rank_model, self.lsi_model, self.bsbi
+            fingerprint, model_fingerprint = self.lsi_fingerprint, self.model_fingerprint
+
+        config = (k, model_fingerprint, self.cascade.config())
+        key = self.result_cache.key(bsbi.process_corp(query), config, bsbi.index_version())
+        docs = self.result_cache.get(key)
+        if docs is None:
+            doc_ids, degraded = self.cascade.rank(bsbi, rank_model, lsi_model, query, k, fingerprint)
+            docs = [os.path.relpath(bsbi.document_path(doc_id), bsbi.data_dir).replace(os.sep, "/")
+                    for doc_id in doc_ids]
+            if not degraded:
+                self.result_cache.set(key, docs)
+        if len(docs) < 1:
+            return None
+        return list(docs)
+
+    def cache_stats(self):
+        """Counter hit/miss cache hasil search"""
+        return self.result_cache.stats()
+
+    def document_text(self, doc_path):
+        """
+        Teks dokumen dengan path doc_path relatif terhadap collection (misal
+        "1/10.txt"), dari document store jika dokumen ada di index
+        """
+        with self.lock:
+            bsbi = self.bsbi
+        doc_id = bsbi.document_id(doc_path)
+        if doc_id is not None:
+            return bsbi.document_text(doc_id)
+        with open(os.path.join(self.base_dir, "collection", doc_path)) as f:
+            return f.read()
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+def get_engine(**kwargs):
+    """
+    Mengembalikan SearchEngine milik proses ini, membuatnya jika belum ada
+    (kwargs hanya dipakai saat SearchEngine dibuat). Aplikasi Django
+    memakai home.models.engine(), yang memberikan cache hasil dari settings.
+    """
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = SearchEngine(**kwargs)
+    return _engine
@@ -0,0 +1,114 @@
+import hashlib
+import numpy as np
+import scipy.sparse
+from gensim.corpora import Dictionary
+from scipy.spatial.distance import cosine
+
+NUM_LATENT_TOPICS = 200
+# Nilai topik yang dibuang oleh gensim (matutils.full2sparse)
+TOPIC_EPS = 1e-9
+
+def vectorize(text, model):
+        dictionary = Dictionary()
+        rep = [topic_value for (_, topic_value) in model[dictionary.doc2bow(text)]]
+        return rep if len(rep) == NUM_LATENT_TOPICS else [0.] * NUM_LATENT_TOPICS
+
+def features_processing(query, doc, model):
+        v_q = vectorize(query, model)
+        v_d = vectorize(doc, model)
+        q = set(query)
+        d = set(doc)
+        cosine_dist = cosine(v_q, v_d)
+        jaccard = len(q & d) / len(q | d)
+        return v_q + v_d + [jaccard] + [cosine_dist]
+
+def bow_matrix(texts, dictionary, num_terms, dtype = np.float64):
+        """
+        Matriks sparse (CSR) banyaknya kemunculan setiap term di texts
+        (satu baris per text), sama dengan dictionary.doc2bow per text
+        """
+        token2id = dictionary.token2id
+        indptr, indices = [0], []
+        for text in texts:
+                indices.extend(token2id[token] for token in text if token in token2id)
+                indptr.append(len(indices))
+        data = np.ones(len(indices), dtype=dtype)
+        # entri duplikat (term yang muncul berulang) dijumlahkan
+        matrix = scipy.sparse.csr_matrix((data, indices, indptr), shape=(len(texts), num_terms))
+        matrix.sum_duplicates()
+        return matrix
+
+def project(texts, model, dictionary = None):
+        """
+        Vektor LSI (num_texts x NUM_LATENT_TOPICS) untuk banyak text
+        sekaligus: satu perkalian matriks sparse bag-of-words dengan matriks
+        proyeksi LSI, sama dengan vectorize per text. Seperti vectorize,
+        vektor yang tidak lengkap (ada topik bernilai ~0 yang dibuang gensim)
+        diganti vektor nol.
+        """
+        if dictionary is None:
+                dictionary = Dictionary()
+        # banyaknya topik bisa lebih kecil dari num_topics (rank korpus)
+        u = model.projection.u[:, :model.num_topics]
+        if u.shape[1] != NUM_LATENT_TOPICS:
+                return np.zeros((len(texts), NUM_LATENT_TOPICS))
+        topics = np.asarray(bow_matrix(texts, dictionary, u.shape[0], u.dtype) @ u, dtype=np.float64)
+        complete = (np.abs(topics) > TOPIC_EPS).all(axis=1)
+        topics[~complete] = 0.
+        return topics
+
+def lsi_fingerprint(model, dictionary = None):
+        """
+        Sidik jari (hex) model LSI dan dictionary: hash matriks proyeksi dan
+        vocabulary, dipakai untuk mencocokkan vektor dokumen yang dihitung
+        offline (lihat docvectors.DocVectors) dengan model yang sedang dipakai
+        """
+        digest = hashlib.sha1()
+        u = np.ascontiguousarray(model.projection.u[:, :model.num_topics])
+        digest.update(repr((u.shape, str(u.dtype))).encode('utf-8'))
+        digest.update(u.tobytes())
+        if dictionary is not None:
+                digest.update(repr(sorted(dictionary.token2id.items())).encode('utf-8'))
+        return digest.hexdigest()
+
+def features_batch(query, docs, model, dictionary = None, doc_vectors = None):
+        """
+        Fitur LambdaMART untuk semua kandidat dokumen sekaligus; setiap baris
+        sama dengan features_processing(query, doc, model). Query
+        di-vectorize sekali, semua dokumen diproyeksikan dengan satu
+        perkalian matriks, dan cosine dihitung untuk seluruh matriks.
+
+        Parameters
+        ----------
+        query: List[str]
+            Token query
+        docs: List[List[str]]
+            Token setiap kandidat dokumen
+        dictionary: gensim Dictionary atau None
+            Vocabulary untuk bag-of-words; default Dictionary kosong seperti
+            pada vectorize
+        doc_vectors: np.ndarray atau None
+            Vektor LSI docs yang sudah dihitung (lihat docvectors.DocVectors);
+            jika None, docs diproyeksikan di sini
+
+        Returns
+        -------
+        np.ndarray
+            Matriks (len(docs) x (2 * NUM_LATENT_TOPICS + 2))
+        """
+        v_q = project([query], model, dictionary)[0]
+        v_d = project(docs, model, dictionary) if doc_vectors is None else np.asarray(doc_vectors, dtype=np.float64)
+
+        # cosine distance seperti scipy.spatial.distance.cosine: NaN jika
+        # salah satu vektor nol
+        with np.errstate(divide='ignore', invalid='ignore'):
+                similarity = (v_d @ v_q) / np.sqrt((v_d * v_d).sum(axis=1) * (v_q @ v_q))
+        cosine_dist = np.clip(1.0 - similarity, 0.0, 2.0)
+
+        q = set(query)
+        jaccard = np.empty(len(docs))
+        for i, doc in enumerate(docs):
+                d = set(doc)
+                jaccard[i] = len(q & d) / len(q | d)
+
+        return np.hstack([np.tile(v_q, (len(docs), 1)), v_d, jaccard[:, None], cosine_dist[:, None]])
@@ -0,0 +1,179 @@
+import os
+import json
+import math
+import heapq
+import numpy as np
+
+from .index import InvertedIndexReader, InvertedIndexWriter
+from .compression import VectorizedVBEPostings
+
+class ImpactPostings:
+    """
+    Codec untuk impact-ordered index. Postings list sebuah term diurutkan
+    berdasarkan impact (skor BM25 terkuantisasi) mengecil, dan di dalam
+    impact yang sama berdasarkan docID. Karena urutan docID tidak monoton,
+    gap di-encode dengan ZigZag (gap negatif -> angka ganjil) sebelum
+    Variable-Byte Encoding; di dalam satu segment impact gap tetap kecil.
+
+    "TF list" pada index ini berisi impact setiap posting (non-increasing),
+    sehingga disimpan dengan run-length encoding: pasangan (impact, panjang
+    run) di-encode dengan Variable-Byte Encoding.
+    """
+
+    @staticmethod
+    def encode(postings_list):
+        postings = np.asarray(postings_list, dtype=np.int64)
+        if postings.size == 0:
+            return b""
+        gaps = np.empty_like(postings)
+        gaps[0] = postings[0]
+        gaps[1:] = np.diff(postings)
+        zigzag = (gaps << 1) ^ (gaps >> 63)
+        return VectorizedVBEPostings.vb_encode(zigzag.astype(np.uint64))
+
+    @staticmethod
+    def decode(encoded_postings_list):
+        zigzag = VectorizedVBEPostings.vb_decode_array(encoded_postings_list).astype(np.int64)
+        gaps = (zigzag >> 1) ^ -(zigzag & 1)
+        return np.cumsum(gaps).tolist()
+
+    @staticmethod
+    def encode_tf(tf_list):
+        impacts = np.asarray(tf_list, dtype=np.uint64)
+        if impacts.size == 0:
+            return b""
+        starts = np.flatnonzero(np.diff(impacts, prepend=impacts[0] + 1))
+        runs = np.diff(np.append(starts, impacts.size))
+        pairs = np.empty(2 * starts.size, dtype=np.uint64)
+        pairs[0::2] = impacts[starts]
+        pairs[1::2] = runs
+        return VectorizedVBEPostings.vb_encode(pairs)
+
+    @staticmethod
+    def decode_tf(encoded_tf_list):
+        pairs = VectorizedVBEPostings.vb_decode_array(encoded_tf_list)
+        return np.repeat(pairs[0::2], pairs[1::2].astype(np.int64)).tolist()
+
+
+class ImpactIndex:
+    """
+    Varian index untuk BM25 dengan kontribusi skor per posting yang sudah
+    dihitung saat indexing (untuk k1 dan b tertentu) dan dikuantisasi ke
+    integer `bits` bit. Postings disimpan impact-ordered (lihat
+    ImpactPostings), sehingga query processing cukup berupa akumulasi
+    integer per segment impact, dari impact terbesar ke terkecil
+    (Score-at-a-Time), dan bisa dihentikan lebih awal.
+
+    Disimpan dengan InvertedIndexWriter sebagai <index_name>.index/.dict/.tdict,
+    ditambah <index_name>.json yang berisi k1, b, bits, dan scale (skor BM25
+    ~= jumlah impact * scale).
+    """
+    def __init__(self, index_name, directory):
+        self.index_name = index_name
+        self.directory = directory
+        with open(os.path.join(directory, index_name + '.json')) as f:
+            metadata = json.load(f)
+        self.k1, self.b, self.bits, self.scale = metadata['k1'], metadata['b'], metadata['bits'], metadata['scale']
+        self.reader = InvertedIndexReader(index_name, ImpactPostings, directory).__enter__()
+
+    @staticmethod
+    def exists(index_name, directory):
+        return os.path.exists(os.path.join(directory, index_name + '.json'))
+
+    def close(self):
+        self.reader.__exit__(None, None, None)
+
+    def __contains__(self, term_id):
+        return term_id in self.reader.postings_dict
+
+    def segments(self, term_id):
+        """List of (impact, docIDs) untuk term_id, impact mengecil"""
+        postings_list, impacts = self.reader.get_postings_list(term_id)
+        postings = np.asarray(postings_list, dtype=np.int64)
+        impacts = np.asarray(impacts, dtype=np.int64)
+        starts = np.flatnonzero(np.diff(impacts, prepend=impacts[0] + 1))
+        ends = np.append(starts[1:], impacts.size)
+        return [(int(impacts[s]), postings[s:e]) for s, e in zip(starts, ends)]
+
+    def score_at_a_time(self, term_counts, n_docs, k = 10, budget = None, deleted = None):
+        """
+        Score-at-a-Time query processing.
+
+        Parameters
+        ----------
+        term_counts: Dict[int, int]
+            termID -> banyaknya kemunculan di query
+        n_docs: int
+            Banyaknya dokumen (ukuran accumulator)
+        budget: int atau None
+            Jika tidak None, berhenti setelah (kurang lebih) budget posting
+            diproses. Karena segment diproses dari impact terbesar, hasilnya
+            adalah aproksimasi terbaik untuk budget tersebut.
+        deleted: DeletionBitmap atau None
+            Dokumen yang dihapus tidak masuk hasil
+
+        Returns
+        -------
+        List[(float, int)]
+            List of (score, docID) terurut mengecil berdasarkan skor
+        """
+        heap = []
+        for term_id, count in term_counts.items():
+            if term_id not in self:
+                continue
+            for impact, docs in self.segments(term_id):
+                if impact > 0:
+                    heap.append((-impact * count, len(heap), docs))
+        heapq.heapify(heap)
+
+        accumulators = np.zeros(n_docs, dtype=np.int32)
+        processed = 0
+        while heap and (budget is None or processed < budget):
+            impact, _, docs = heapq.heappop(heap)
+            # docID unik di dalam satu segment, sehingga fancy-index aman
+            accumulators[docs] += -impact
+            processed += docs.size
+        if deleted:
+            doc_ids = deleted.doc_ids()
+            accumulators[doc_ids[doc_ids < n_docs]] = 0
+
+        candidates = np.flatnonzero(accumulators)
+        if candidates.size > k:
+            candidates = candidates[np.argpartition(-accumulators[candidates], k - 1)[:k]]
+        top = sorted(((int(accumulators[d]), int(d)) for d in candidates), key=lambda x: x[0], reverse=True)
+        return [(score * self.scale, doc_id) for score, doc_id in top]
+
+    @staticmethod
+    def build(reader, index_name, directory, n, doc_length, avg_doc_length, k1 = 1.5, b = 0.7, bits = 8):
+        """
+        Membangun impact-ordered index dari reader (main index yang sudah
+        dibuka). Pass pertama mencari skor BM25 maksimum untuk menentukan
+        skala kuantisasi, pass kedua menulis postings impact-ordered.
+        """
+        def bm25_scores(postings_list, tf_list):
+            postings = np.asarray(postings_list, dtype=np.int64)
+            tfs = np.asarray(tf_list, dtype=np.float64)
+            lengths = doc_length.take(postings).astype(np.float64)
+            idf = math.log(n / len(postings_list))
+            return postings, idf * ((k1 + 1) * tfs) / (k1 * ((1 - b) + b * lengths / avg_doc_length) + tfs)
+
+        max_score = 0.0
+        reader.reset()
+        for _, postings_list, tf_list in reader:
+            max_score = max(max_score, float(bm25_scores(postings_list, tf_list)[1].max()))
+        levels = (1 << bits) - 1
+        scale = max_score / levels if max_score > 0 else 1.0
+
+        reader.reset()
+        with InvertedIndexWriter(index_name, ImpactPostings, directory = directory, compact_dict = True) as writer:
+            for term, postings_list, tf_list in reader:
+                postings, scores = bm25_scores(postings_list, tf_list)
+                # Posting dengan skor > 0 minimal mendapat impact 1
+                impacts = np.clip(np.ceil(scores / scale), 0, levels).astype(np.int64)
+                order = np.lexsort((postings, -impacts))
+                writer.append(term, postings[order].tolist(), impacts[order].tolist())
+            # append menjumlahkan impact sebagai "panjang dokumen"; sidecar
+            # panjang dokumen berisi panjang dokumen yang sebenarnya
+            writer.doc_length = doc_length
+        with open(os.path.join(directory, index_name + '.json'), 'w') as f:
+            json.dump({'k1': k1, 'b': b, 'bits': bits, 'scale': scale}, f)
@@ -1,5 +1,89 @@
 import pickle
 import os
+import mmap
+import array
+import struct
+import bisect
+import threading
+
+from .doclengths import DocLengths
+
+class CompactPostingsDict:
+    """
+    Representasi biner dari postings_dict yang disimpan di file <index_name>.tdict.
+    Daripada sebuah python's Dictionary hasil unpickle (dengan overhead puluhan
+    bytes per entry), file ini berisi array fixed-width yang diindeks langsung
+    dengan termID dan dimuat dengan mmap, sehingga membukanya O(1) dan tidak
+    menambah RSS seiring bertambahnya vocabulary.
+
+    Layout file (little-endian / native, unsigned 64-bit):
+        header  : magic b'TDCT', version (uint32), n_slots, n_terms
+        entries : n_slots x (start_position, df, len_postings, len_tf),
+                  slot ke-i milik termID i; df = 0 berarti term tidak ada
+        terms   : n_terms termID sesuai urutan masuk ke index
+
+    Class ini meniru interface Dictionary yang dipakai oleh InvertedIndex,
+    yaitu postings_dict[termID] -> 4-tuple, `in`, len, dan iterasi termID.
+    """
+    MAGIC = b'TDCT'
+    VERSION = 1
+    HEADER = struct.Struct('<4sIQQ')
+
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, 'rb')
+        self.mmap = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.n_slots, n_terms = self.HEADER.unpack_from(self.mmap, 0)
+        if magic != self.MAGIC or version != self.VERSION:
+            raise ValueError(f"{path} bukan file term dictionary yang valid")
+        words = memoryview(self.mmap)[self.HEADER.size:].cast('Q')
+        self.entries = words[:4 * self.n_slots]
+        self.terms = words[4 * self.n_slots:4 * self.n_slots + n_terms]
+
+    @classmethod
+    def write(cls, path, postings_dict, terms):
+        """Menulis postings_dict (python's Dictionary) dan terms ke path"""
+        n_slots = max(terms) + 1 if terms else 0
+        entries = array.array('Q', bytes(8 * 4 * n_slots))
+        for term, metadata in postings_dict.items():
+            entries[4 * term:4 * term + 4] = array.array('Q', metadata)
+        with open(path, 'wb') as f:
+            f.write(cls.HEADER.pack(cls.MAGIC, cls.VERSION, n_slots, len(terms)))
+            entries.tofile(f)
+            array.array('Q', terms).tofile(f)
+
+    def close(self):
+        self.entries.release()
+        self.terms.release()
+        self.mmap.close()
+        self.file.close()
+
+    def __getitem__(self, term):
+        if not 0 <= term < self.n_slots or self.entries[4 * term + 1] == 0:
+            raise KeyError(term)
+        return tuple(self.entries[4 * term:4 * term + 4])
+
+    def get(self, term, default = None):
+        try:
+            return self[term]
+        except KeyError:
+            return default
+
+    def __contains__(self, term):
+        return 0 <= term < self.n_slots and self.entries[4 * term + 1] != 0
+
+    def __len__(self):
+        return len(self.terms)
+
+    def __iter__(self):
+        return iter(self.terms)
+
+    def keys(self):
+        return iter(self.terms)
+
+    def items(self):
+        for term in self.terms:
+            yield term, self[term]
 
 class InvertedIndex:
     """
@@ -36,7 +120,30 @@ class InvertedIndex:
         List of terms IDs, untuk mengingat urutan terms yang dimasukan ke
         dalam Inverted Index.
 
+    block_size: int atau None
+        Jika tidak None, postings list dengan df > block_size disimpan dalam
+        layout ber-block: list dipecah menjadi block berisi block_size posting,
+        dan setiap block ditulis sebagai
+            header (BLOCK_HEADER): last_docID, banyaknya posting,
+                                   panjang bytes postings, panjang bytes TF,
+                                   TF maksimum di block tersebut
+            encoded postings block, encoded TF block
+        Setiap block di-encode secara independen, sehingga reader bisa
+        melompati block (skip pointer) tanpa decoding, dan TF maksimum per
+        block (block-max) bisa dipakai untuk dynamic pruning. Untuk list
+        ber-block, postings_dict menyimpan panjang seluruh block pada
+        length_in_bytes_of_postings_list, dan length_in_bytes_of_tf_list = 0.
+
+    doc_length: DocLengths
+        Panjang setiap dokumen, disimpan terpisah dari metadata sebagai
+        <index_name>.doclen.npy dan <index_name>.collection.json (lihat
+        doclengths.DocLengths). Saat menulis, doc_length berupa dictionary.
+
     """
+    BLOCK_HEADER = struct.Struct('<IIIII')
+    # Semua file milik sebuah index
+    EXTENSIONS = ('.index', '.dict', '.tdict', '.doclen.npy', '.collection.json')
+
     def __init__(self, index_name, postings_encoding, directory=''):
         """
         Parameters
@@ -47,13 +154,16 @@ class InvertedIndex:
         directory (str): directory dimana file index berada
         """
 
+        self.index_name = index_name
         self.index_file_path = os.path.join(directory, index_name+'.index')
         self.metadata_file_path = os.path.join(directory, index_name+'.dict')
+        self.compact_dict_file_path = os.path.join(directory, index_name+'.tdict')
 
         self.postings_encoding = postings_encoding
         self.directory = directory
 
         self.postings_dict = {}
+        self.block_size = None
         self.avg_doc_length = 0 # Digunakan untuk BM-25
         self.terms = []         # Untuk keep track urutan term yang dimasukkan ke index
         self.doc_length = {}    # key: doc ID (int), value: document length (number of tokens)
@@ -67,11 +177,12 @@ class InvertedIndex:
             1. Dictionary ---> postings_dict
             2. iterator untuk List yang berisi urutan term yang masuk ke
                 index saat konstruksi. ---> term_iter
-            3. doc_length, sebuah python's dictionary yang berisi key = doc id, dan
-                value berupa banyaknya token dalam dokumen tersebut (panjang dokumen).
+            3. doc_length (DocLengths) yang memetakan doc id ke banyaknya token
+                dalam dokumen tersebut (panjang dokumen).
                 Berguna untuk normalisasi panjang saat menggunakan TF-IDF atau BM25
                 scoring regime; berguna untuk untuk mengetahui nilai N saat hitung IDF,
-                dimana N adalah banyaknya dokumen di koleksi
+                dimana N adalah banyaknya dokumen di koleksi. Index lama menyimpan
+                doc_length sebagai dictionary di file metadata.
 
         Metadata disimpan ke file dengan bantuan library "pickle"
 
@@ -80,34 +191,106 @@ class InvertedIndex:
 
         https://docs.python.org/3/reference/datamodel.html#object.__enter__
         """
-        # Membuka index file
-        self.index_file = open(self.index_file_path, 'rb+')
+        # Membuka index file (read-only)
+        self.index_file = open(self.index_file_path, 'rb')
 
         # Kita muat postings dict dan terms iterator dari file metadata
         with open(self.metadata_file_path, 'rb') as f:
-            self.postings_dict, self.terms, self.doc_length, self.avg_doc_length = pickle.load(f)
+            metadata = pickle.load(f)
+            self.postings_dict, self.terms, self.doc_length, self.avg_doc_length = metadata[:4]
+            # Index lama belum menyimpan block_size
+            self.block_size = metadata[4] if len(metadata) > 4 else None
             self.term_iter = self.terms.__iter__()
+        if DocLengths.exists(self.directory, self.index_name):
+            self.doc_length = DocLengths.load(self.directory, self.index_name)
+        else:
+            self.doc_length = DocLengths.from_dict(self.doc_length)
+        self.avg_doc_length = self.doc_length.avg_doc_length
 
         return self
 
     def __exit__(self, exception_type, exception_value, traceback):
-        """Menutup index_file dan menyimpan postings_dict dan terms ketika keluar context"""
-        # Menutup index file
+        """Menutup index_file ketika keluar context"""
         self.index_file.close()
-        temporary = 0
-        for i in self.doc_length.values():
-            temporary += i
-        self.avg_doc_length = temporary / len(self.doc_length)
-        # Menyimpan metadata (postings dict dan terms) ke file metadata dengan bantuan pickle
-        with open(self.metadata_file_path, 'wb') as f:
-            pickle.dump([self.postings_dict, self.terms, self.doc_length, self.avg_doc_length], f)
 
 
 class InvertedIndexReader(InvertedIndex):
     """
     Class yang mengimplementasikan bagaimana caranya scan atau membaca secara
     efisien Inverted Index yang disimpan di sebuah file.
+
+    Reader bersifat read-only: index file dibuka dengan mode 'rb' dan metadata
+    tidak pernah ditulis ulang ketika keluar context. get_postings_list aman
+    dipanggil dari beberapa thread sekaligus pada instance yang sama; iterasi
+    (__next__) memakai posisi iterator milik instance sehingga hanya untuk
+    satu thread.
+
+    Secara default index file di-mmap, sehingga pembacaan postings hanyalah
+    slicing memoryview (zero-copy) dan page cache OS dipakai bersama oleh
+    semua worker yang membuka file yang sama.
     """
+    def __init__(self, index_name, postings_encoding, directory='', use_mmap=True):
+        super().__init__(index_name, postings_encoding, directory)
+        self.use_mmap = use_mmap
+        self.index_mmap = None
+        self.index_view = None
+
+    def __enter__(self):
+        super().__enter__()
+        self.read_lock = threading.Lock()
+        # Jika index ditulis dengan compact_dict=True, postings_dict dan terms
+        # dibaca dari file .tdict (mmap), bukan dari hasil unpickle
+        if os.path.exists(self.compact_dict_file_path):
+            self.postings_dict = CompactPostingsDict(self.compact_dict_file_path)
+            self.terms = self.postings_dict.terms
+            self.term_iter = self.terms.__iter__()
+        # mmap tidak bisa dibuat untuk file kosong
+        if self.use_mmap and os.path.getsize(self.index_file_path) > 0:
+            self.index_mmap = mmap.mmap(self.index_file.fileno(), 0, access=mmap.ACCESS_READ)
+            self.index_view = memoryview(self.index_mmap)
+        return self
+
+    def __exit__(self, exception_type, exception_value, traceback):
+        if self.index_view is not None:
+            self.index_view.release()
+            try:
+                self.index_mmap.close()
+            except BufferError:
+                # Masih ada slice yang dipegang pemanggil; mmap akan
+                # tertutup sendiri ketika slice tersebut dibebaskan
+                pass
+            self.index_mmap, self.index_view = None, None
+        if isinstance(self.postings_dict, CompactPostingsDict):
+            self.term_iter = None
+            self.postings_dict.close()
+        super().__exit__(exception_type, exception_value, traceback)
+
+    def read_at(self, position, length):
+        """
+        Membaca length bytes mulai dari posisi position tanpa mengubah file
+        pointer bersama. Jika index di-mmap, yang dikembalikan adalah slice
+        memoryview tanpa copy. Selain itu menggunakan os.pread jika tersedia
+        (POSIX), atau seek dan read di bawah lock.
+        """
+        if self.index_view is not None:
+            return self.index_view[position:position + length]
+        if hasattr(os, 'pread'):
+            return os.pread(self.index_file.fileno(), length, position)
+        with self.read_lock:
+            self.index_file.seek(position, 0)
+            return self.index_file.read(length)
+
+    def advise_sequential(self):
+        """
+        Memberi tahu OS bahwa index file akan dibaca berurutan (misalnya saat
+        merge), sehingga read-ahead diperbesar dan page yang sudah dibaca
+        bisa cepat dibuang dari page cache
+        """
+        if self.index_mmap is not None and hasattr(self.index_mmap, 'madvise') and hasattr(mmap, 'MADV_SEQUENTIAL'):
+            self.index_mmap.madvise(mmap.MADV_SEQUENTIAL)
+        elif hasattr(os, 'posix_fadvise'):
+            os.posix_fadvise(self.index_file.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+
     def __iter__(self):
         return self
 
@@ -136,10 +319,49 @@ class InvertedIndexReader(InvertedIndex):
         """
         curr_term = next(self.term_iter)
         pos, number_of_postings, len_in_bytes_of_postings, len_in_bytes_of_tf = self.postings_dict[curr_term]
-        postings_list = self.postings_encoding.decode(self.index_file.read(len_in_bytes_of_postings))
-        tf_list = self.postings_encoding.decode_tf(self.index_file.read(len_in_bytes_of_tf))
+        if self.index_view is not None:
+            encoded = self.read_at(pos, len_in_bytes_of_postings + len_in_bytes_of_tf)
+        else:
+            encoded = self.index_file.read(len_in_bytes_of_postings + len_in_bytes_of_tf)
+        postings_list, tf_list = self.decode_postings(number_of_postings, encoded, len_in_bytes_of_postings)
         return (curr_term, postings_list, tf_list)
 
+    def is_blocked(self, number_of_postings):
+        """Apakah postings list dengan df number_of_postings disimpan ber-block"""
+        return self.block_size is not None and number_of_postings > self.block_size
+
+    def read_block_headers(self, encoded):
+        """
+        Membaca semua header block dari sebuah postings list ber-block tanpa
+        decoding postings. Mengembalikan list of tuple
+        (last_docID, count, max_tf, posisi postings, panjang postings,
+         posisi TF, panjang TF), posisi relatif terhadap awal encoded.
+        """
+        blocks = []
+        offset = 0
+        while offset < len(encoded):
+            last_doc, count, len_postings, len_tf, max_tf = self.BLOCK_HEADER.unpack_from(encoded, offset)
+            offset += self.BLOCK_HEADER.size
+            blocks.append((last_doc, count, max_tf, offset, len_postings, offset + len_postings, len_tf))
+            offset += len_postings + len_tf
+        return blocks
+
+    def decode_postings(self, number_of_postings, encoded, len_in_bytes_of_postings):
+        """Decoding postings list dan TF list dari bytes yang dibaca dari index file"""
+        if not self.is_blocked(number_of_postings):
+            postings_list = self.postings_encoding.decode(encoded[:len_in_bytes_of_postings])
+            tf_list = self.postings_encoding.decode_tf(encoded[len_in_bytes_of_postings:])
+            return postings_list, tf_list
+        postings_list, tf_list = [], []
+        for _, _, _, pos, len_postings, tf_pos, len_tf in self.read_block_headers(encoded):
+            postings_list.extend(self.postings_encoding.decode(encoded[pos:pos + len_postings]))
+            tf_list.extend(self.postings_encoding.decode_tf(encoded[tf_pos:tf_pos + len_tf]))
+        return postings_list, tf_list
+
+    def cursor(self, term):
+        """Mengembalikan PostingsCursor untuk term"""
+        return PostingsCursor(self, term)
+
     def get_postings_list(self, term):
         """
         Kembalikan sebuah postings list (list of docIDs) beserta list
@@ -152,23 +374,150 @@ class InvertedIndexReader(InvertedIndex):
         list of TF) dari term disimpan.
         """
         # TDO
-        start = self.postings_dict[term][0]
-        length = self.postings_dict[term][2]
-        self.index_file.seek(start, 0)
-        postings_list = self.postings_encoding.decode(self.index_file.read(length))
-        tf_length = self.postings_dict[term][3]
-        tf_list = self.postings_encoding.decode_tf(self.index_file.read(tf_length))
-        return (postings_list, tf_list)
+        start, number_of_postings, length, tf_length = self.postings_dict[term]
+        encoded = self.read_at(start, length + tf_length)
+        return self.decode_postings(number_of_postings, encoded, length)
+
+
+class PostingsCursor:
+    """
+    Iterator docID-at-a-time terhadap postings list sebuah term, dipakai
+    oleh query processing Document-at-a-Time (DaaT).
+
+    Untuk postings list ber-block (lihat InvertedIndex.block_size), header
+    setiap block dibaca di awal dan block hanya di-decode ketika dibutuhkan;
+    next_geq(..) memakai last_docID setiap block sebagai skip pointer.
+    Postings list yang tidak ber-block diperlakukan sebagai satu block.
+
+    Attributes
+    ----------
+    doc: docID posting saat ini, atau PostingsCursor.END jika sudah habis
+    tf: term frequency posting saat ini
+    df: banyaknya posting (document frequency)
+    max_tf: TF maksimum di seluruh postings list
+    """
+    END = float('inf')
+
+    def __init__(self, reader, term):
+        self.reader = reader
+        self.term = term
+        start, self.df, length, tf_length = reader.postings_dict[term]
+        self.encoded = reader.read_at(start, length + tf_length)
+        if reader.is_blocked(self.df):
+            self.blocks = reader.read_block_headers(self.encoded)
+        else:
+            postings_list, tf_list = reader.decode_postings(self.df, self.encoded, length)
+            self.blocks = [(postings_list[-1], self.df, max(tf_list), None, None, None, None)]
+            self.decoded = (postings_list, tf_list)
+        self.last_docs = [block[0] for block in self.blocks]
+        self.max_tf = max(block[2] for block in self.blocks)
+        self.block_index = -1
+        self.load_block(0)
+
+    def load_block(self, block_index):
+        """Decoding block ke-block_index dan memposisikan cursor di awal block"""
+        self.block_index = block_index
+        if block_index >= len(self.blocks):
+            self.postings, self.tfs, self.position = [], [], 0
+            self.doc, self.tf = self.END, 0
+            return
+        _, _, _, pos, len_postings, tf_pos, len_tf = self.blocks[block_index]
+        if pos is None:
+            self.postings, self.tfs = self.decoded
+        else:
+            encoding = self.reader.postings_encoding
+            self.postings = encoding.decode(self.encoded[pos:pos + len_postings])
+            self.tfs = encoding.decode_tf(self.encoded[tf_pos:tf_pos + len_tf])
+        self.position = 0
+        self.doc, self.tf = self.postings[0], self.tfs[0]
+
+    def next(self):
+        """Maju ke posting berikutnya"""
+        self.position += 1
+        if self.position < len(self.postings):
+            self.doc, self.tf = self.postings[self.position], self.tfs[self.position]
+        else:
+            self.load_block(self.block_index + 1)
+
+    def next_geq(self, target):
+        """Maju ke posting pertama dengan docID >= target"""
+        if self.doc >= target:
+            return
+        if target > self.last_docs[self.block_index]:
+            # skip pointer: lompati block yang last_docID-nya < target
+            self.load_block(bisect.bisect_left(self.last_docs, target, self.block_index + 1))
+            if self.doc >= target:
+                return
+        self.position = bisect.bisect_left(self.postings, target, self.position)
+        self.doc, self.tf = self.postings[self.position], self.tfs[self.position]
+
+    def shallow_block(self, target):
+        """
+        Index block yang akan memuat target jika cursor dimajukan ke target,
+        tanpa memindahkan cursor dan tanpa decoding
+        """
+        if target <= self.last_docs[min(self.block_index, len(self.blocks) - 1)]:
+            return self.block_index
+        return bisect.bisect_left(self.last_docs, target, self.block_index + 1)
+
+    def block_max_tf(self, target = None):
+        """
+        TF maksimum di block tempat cursor berada saat ini, atau di block
+        yang memuat target jika target diberikan
+        """
+        block_index = self.block_index if target is None else self.shallow_block(target)
+        return self.blocks[block_index][2] if block_index < len(self.blocks) else 0
+
+    def block_last_doc(self, target = None):
+        """
+        last_docID dari block tempat cursor berada saat ini, atau dari block
+        yang memuat target jika target diberikan
+        """
+        block_index = self.block_index if target is None else self.shallow_block(target)
+        return self.last_docs[block_index] if block_index < len(self.blocks) else self.END
+
 
 class InvertedIndexWriter(InvertedIndex):
     """
     Class yang mengimplementasikan bagaimana caranya menulis secara
     efisien Inverted Index yang disimpan di sebuah file.
+
+    Jika compact_dict=True, postings_dict dan terms disimpan ke file .tdict
+    (lihat CompactPostingsDict), dan file .dict hanya berisi avg_doc_length
+    dan block_size. doc_length (dictionary, atau DocLengths hasil merge)
+    disimpan sebagai DocLengths.
     """
+    def __init__(self, index_name, postings_encoding, directory='', compact_dict=False, block_size=None):
+        super().__init__(index_name, postings_encoding, directory)
+        self.compact_dict = compact_dict
+        self.block_size = block_size
+
+    WRITE_BUFFER_SIZE = 1 << 20
+
     def __enter__(self):
-        self.index_file = open(self.index_file_path, 'wb+')
+        self.index_file = open(self.index_file_path, 'wb+', buffering=self.WRITE_BUFFER_SIZE)
         return self
 
+    def __exit__(self, exception_type, exception_value, traceback):
+        """Menutup index_file dan menyimpan postings_dict dan terms ketika keluar context"""
+        # Menutup index file
+        self.index_file.close()
+        doc_length = self.doc_length
+        if not isinstance(doc_length, DocLengths):
+            doc_length = DocLengths.from_dict(doc_length)
+        doc_length.save(self.directory, self.index_name)
+        self.avg_doc_length = doc_length.avg_doc_length
+        # Menyimpan metadata (postings dict dan terms) ke file metadata dengan bantuan pickle
+        if self.compact_dict:
+            CompactPostingsDict.write(self.compact_dict_file_path, self.postings_dict, self.terms)
+            with open(self.metadata_file_path, 'wb') as f:
+                pickle.dump([{}, [], None, self.avg_doc_length, self.block_size], f)
+        else:
+            if os.path.exists(self.compact_dict_file_path):
+                os.remove(self.compact_dict_file_path)
+            with open(self.metadata_file_path, 'wb') as f:
+                pickle.dump([self.postings_dict, self.terms, None, self.avg_doc_length, self.block_size], f)
+
     def append(self, term, postings_list, tf_list):
         """
         Menambahkan (append) sebuah term, postings_list, dan juga TF list 
@@ -207,36 +556,75 @@ class InvertedIndexWriter(InvertedIndex):
         """
         # TDO
         encoder = self.postings_encoding
-        lst_of_byte = encoder.encode(postings_list)
-        tf_of_byte = encoder.encode_tf(tf_list)
-        lst_of_doc_length = []
+        if self.block_size is not None and len(postings_list) > self.block_size:
+            lst_of_byte = self.encode_blocks(postings_list, tf_list)
+            tf_of_byte = b""
+        else:
+            lst_of_byte = encoder.encode(postings_list)
+            tf_of_byte = encoder.encode_tf(tf_list)
         if self.terms == []:
             self.postings_dict[term] = (0, len(postings_list), len(lst_of_byte), len(tf_of_byte))
         else:
             start = self.postings_dict[self.terms[-1]][0] + self.postings_dict[self.terms[-1]][3]
             length = self.postings_dict[self.terms[-1]][2]
             self.postings_dict[term] = (start + length, len(postings_list), len(lst_of_byte), len(tf_of_byte))
-        for i in range(len(postings_list)):
-            lst_of_doc_length.append((postings_list[i], tf_list[i]))
-
-        if not self.doc_length:
-            for i in lst_of_doc_length:
-                self.doc_length[i[0]] = i[1]
-        else:
-            for i in lst_of_doc_length:
-                curr_len = self.doc_length.get(i[0], 0)
-                self.doc_length[i[0]] = curr_len + i[1]
+        doc_length = self.doc_length
+        for doc_id, tf in zip(postings_list, tf_list):
+            doc_length[doc_id] = doc_length.get(doc_id, 0) + tf
         self.terms.append(term)
         self.index_file.write(lst_of_byte)
         self.index_file.write(tf_of_byte)
         return None
 
+    def append_blocks(self, term, blocks):
+        """
+        Streaming append untuk postings list ber-block: blocks adalah iterable
+        of bytes, masing-masing satu atau lebih block utuh (BLOCK_HEADER,
+        postings, TF; lihat encode_blocks), yang langsung ditulis ke index
+        file tanpa menahan seluruh postings list di memori. Banyaknya posting
+        dihitung dari header setiap block.
+
+        Pemanggil bertanggung jawab agar df > block_size (supaya reader
+        membacanya sebagai list ber-block) dan mengisi self.doc_length
+        (dictionary atau DocLengths).
+        """
+        start = self.index_file.tell()
+        number_of_postings = 0
+        length = 0
+        for block in blocks:
+            offset = 0
+            while offset < len(block):
+                _, count, postings_length, tf_length, _ = self.BLOCK_HEADER.unpack_from(block, offset)
+                number_of_postings += count
+                offset += self.BLOCK_HEADER.size + postings_length + tf_length
+            length += len(block)
+            self.index_file.write(block)
+        self.postings_dict[term] = (start, number_of_postings, length, 0)
+        self.terms.append(term)
+
+    def encode_blocks(self, postings_list, tf_list):
+        """Encode postings_list dan tf_list dengan layout ber-block (lihat InvertedIndex)"""
+        encoded = []
+        for i in range(0, len(postings_list), self.block_size):
+            postings_block = postings_list[i:i + self.block_size]
+            tf_block = tf_list[i:i + self.block_size]
+            encoded_postings = self.postings_encoding.encode(postings_block)
+            encoded_tf = self.postings_encoding.encode_tf(tf_block)
+            encoded.append(self.BLOCK_HEADER.pack(postings_block[-1], len(postings_block),
+                                                  len(encoded_postings), len(encoded_tf), max(tf_block)))
+            encoded.append(encoded_postings)
+            encoded.append(encoded_tf)
+        return b"".join(encoded)
+
 
 if __name__ == "__main__":
 
-    from compression import VBEPostings
+    # dijalankan sebagai module: python -m home.index
+    from .compression import VBEPostings
 
-    with InvertedIndexWriter('test', postings_encoding=VBEPostings, directory='./tmp/') as index:
+    tmp_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'tmp')
+
+    with InvertedIndexWriter('test', postings_encoding=VBEPostings, directory=tmp_dir) as index:
         index.append(1, [2, 3, 4, 8, 10], [2, 4, 2, 3, 30])
         index.append(2, [3, 4, 5], [34, 23, 56])
         index.index_file.seek(0)
@@ -254,3 +642,50 @@ if __name__ == "__main__":
         index.index_file.seek(index.postings_dict[2][0])
         assert VBEPostings.decode(index.index_file.read(len(VBEPostings.encode([3,4,5])))) == [3,4,5], "terdapat kesalahan"
         assert VBEPostings.decode_tf(index.index_file.read(len(VBEPostings.encode_tf([34,23,56])))) == [34,23,56], "terdapat kesalahan"
+
+    metadata_mtime = os.path.getmtime(os.path.join(tmp_dir, 'test.dict'))
+    for use_mmap in [True, False]:
+        with InvertedIndexReader('test', postings_encoding=VBEPostings, directory=tmp_dir, use_mmap=use_mmap) as index:
+            assert index.get_postings_list(2) == ([3,4,5], [34,23,56]), "terdapat kesalahan"
+            assert index.get_postings_list(1) == ([2,3,4,8,10], [2,4,2,3,30]), "terdapat kesalahan"
+            assert [term for term, _, _ in index] == [1, 2], "terdapat kesalahan"
+            assert dict(index.doc_length.items()) == {2:2, 3:38, 4:25, 5:56, 8:3, 10:30}, "doc_length salah"
+            assert index.doc_length.take([5, 3]).tolist() == [56, 38] and index.avg_doc_length == 154 / 6, \
+                "doc_length salah"
+    assert os.path.getmtime(os.path.join(tmp_dir, 'test.dict')) == metadata_mtime, "reader tidak boleh menulis metadata"
+
+    with InvertedIndexWriter('test_compact', postings_encoding=VBEPostings, directory=tmp_dir, compact_dict=True) as index:
+        index.append(1, [2, 3, 4, 8, 10], [2, 4, 2, 3, 30])
+        index.append(5, [3, 4, 5], [34, 23, 56])
+    with InvertedIndexReader('test_compact', postings_encoding=VBEPostings, directory=tmp_dir) as index:
+        assert list(index.terms) == [1, 5], "terms salah"
+        assert 5 in index.postings_dict and 3 not in index.postings_dict, "postings dictionary salah"
+        assert index.postings_dict[5][1] == 3, "postings dictionary salah"
+        assert index.get_postings_list(5) == ([3,4,5], [34,23,56]), "terdapat kesalahan"
+        assert [term for term, _, _ in index] == [1, 5], "terdapat kesalahan"
+    for ext in InvertedIndex.EXTENSIONS:
+        os.remove(os.path.join(tmp_dir, 'test_compact' + ext))
+
+    with InvertedIndexWriter('test_blocked', postings_encoding=VBEPostings, directory=tmp_dir, block_size=4) as index:
+        index.append(1, [2, 3, 4, 8, 10, 11, 15, 20, 21, 30], [2, 4, 2, 3, 30, 1, 1, 7, 1, 2])
+        index.append(2, [3, 4, 5], [34, 23, 56])
+    with InvertedIndexReader('test_blocked', postings_encoding=VBEPostings, directory=tmp_dir) as index:
+        assert index.get_postings_list(1) == ([2, 3, 4, 8, 10, 11, 15, 20, 21, 30], [2, 4, 2, 3, 30, 1, 1, 7, 1, 2]), "terdapat kesalahan"
+        assert index.get_postings_list(2) == ([3, 4, 5], [34, 23, 56]), "terdapat kesalahan"
+        assert [term for term, _, _ in index] == [1, 2], "terdapat kesalahan"
+        cursor = index.cursor(1)
+        assert (cursor.doc, cursor.tf, cursor.max_tf, cursor.block_max_tf()) == (2, 2, 30, 4), "cursor salah"
+        cursor.next_geq(11)
+        assert (cursor.doc, cursor.tf, cursor.block_max_tf(), cursor.block_last_doc()) == (11, 1, 30, 20), "skip salah"
+        cursor.next_geq(16)
+        assert (cursor.doc, cursor.tf, cursor.block_max_tf()) == (20, 7, 30), "skip salah"
+        cursor.next()
+        cursor.next()
+        assert (cursor.doc, cursor.tf, cursor.block_last_doc()) == (30, 2, 30), "next salah"
+        cursor.next_geq(31)
+        assert cursor.doc == PostingsCursor.END, "cursor seharusnya habis"
+    for ext in InvertedIndex.EXTENSIONS:
+        if os.path.exists(os.path.join(tmp_dir, 'test_blocked' + ext)):
+            os.remove(os.path.join(tmp_dir, 'test_blocked' + ext))
+    for ext in ['.doclen.npy', '.collection.json']:
+        os.remove(os.path.join(tmp_dir, 'test' + ext))
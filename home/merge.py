@@ -0,0 +1,303 @@
+import heapq
+import itertools
+
+from .util import sorted_merge_posts_and_tfs_multi
+from .doclengths import DocLengths
+
+class PostingsRun:
+    """
+    Postings list sebuah term di salah satu index masukan merge, dibaca
+    block demi block. Untuk postings list ber-block, bytes block (header +
+    postings + TF) bisa disalin apa adanya ke index hasil merge tanpa
+    decoding; postings list yang tidak ber-block (df kecil) di-decode
+    sekaligus.
+
+    Posting milik docID yang ada di deleted (DeletionBitmap) dibuang; block
+    yang rentang docID-nya memuat dokumen terhapus di-decode dan disaring.
+    """
+    def __init__(self, reader, term, deleted = None):
+        self.reader = reader
+        self.deleted = deleted
+        start, self.df, length, tf_length = reader.postings_dict[term]
+        self.encoded = reader.read_at(start, length + tf_length)
+        if reader.is_blocked(self.df):
+            self.blocks = reader.read_block_headers(self.encoded)
+            self.first_doc = self.decode_block(self.blocks[0])[0][0]
+            self.last_doc = self.blocks[-1][0]
+        else:
+            self.blocks = None
+            self.decoded = reader.decode_postings(self.df, self.encoded, length)
+            self.first_doc = self.decoded[0][0]
+            self.last_doc = self.decoded[0][-1]
+
+    def decode_block(self, block):
+        _, _, _, pos, len_postings, tf_pos, len_tf = block
+        encoding = self.reader.postings_encoding
+        return (encoding.decode(self.encoded[pos:pos + len_postings]),
+                encoding.decode_tf(self.encoded[tf_pos:tf_pos + len_tf]))
+
+    def chunks(self, chunk_size):
+        """
+        Generator chunk dengan paling banyak chunk_size posting. Chunk
+        berupa (None, postings_list, tf_list), atau (raw, header block, None)
+        untuk block yang bisa disalin apa adanya, dimana raw adalah bytes
+        block utuh; gunakan decode_chunk untuk mendapatkan isinya.
+        """
+        header_size = self.reader.BLOCK_HEADER.size
+        if self.blocks is None:
+            postings_list, tf_list = self.live(*self.decoded)
+            for i in range(0, len(postings_list), chunk_size):
+                yield None, postings_list[i:i + chunk_size], tf_list[i:i + chunk_size]
+        else:
+            first_doc = self.first_doc
+            for block in self.blocks:
+                last_doc, count, _, pos, _, tf_pos, len_tf = block
+                has_deleted = bool(self.deleted) and self.deleted.count_between(first_doc, last_doc) > 0
+                first_doc = last_doc + 1
+                if count > chunk_size or has_deleted:
+                    postings_list, tf_list = self.live(*self.decode_block(block))
+                    for i in range(0, len(postings_list), chunk_size):
+                        yield None, postings_list[i:i + chunk_size], tf_list[i:i + chunk_size]
+                else:
+                    yield self.encoded[pos - header_size:tf_pos + len_tf], block, None
+
+    def live(self, postings_list, tf_list):
+        """Membuang posting milik dokumen yang dihapus"""
+        if not self.deleted:
+            return postings_list, tf_list
+        deleted = self.deleted
+        kept = [i for i, doc_id in enumerate(postings_list) if doc_id not in deleted]
+        if len(kept) == len(postings_list):
+            return postings_list, tf_list
+        return [postings_list[i] for i in kept], [tf_list[i] for i in kept]
+
+    def deleted_count(self):
+        """Batas atas banyaknya posting run ini yang akan dibuang"""
+        return self.deleted.count_between(self.first_doc, self.last_doc) if self.deleted else 0
+
+    def decode_chunk(self, chunk):
+        raw, postings_list, tf_list = chunk
+        if tf_list is None:
+            return self.decode_block(postings_list)
+        return postings_list, tf_list
+
+    def postings(self, chunk_size):
+        """Generator (docID, tf) yang men-decode satu block setiap kali"""
+        for chunk in self.chunks(chunk_size):
+            yield from zip(*self.decode_chunk(chunk))
+
+
+def merge_indices(indices, merged_index, chunk_size = None, deleted = None):
+    """
+    External k-way merge beberapa InvertedIndexReader ke sebuah
+    InvertedIndexWriter secara streaming.
+
+    Untuk setiap term, postings list dari semua index masukan (run)
+    diurutkan berdasarkan docID pertama. Jika rentang docID antar run
+    tidak tumpang tindih (kasus BSBI biasa: docID diberikan berurutan per
+    block), block-block ber-encode disalin langsung ke output tanpa
+    decoding; hanya block parsial dan postings list kecil yang di-decode
+    lalu dikumpulkan menjadi block baru. Jika tumpang tindih, postings
+    di-merge dengan heap sambil men-decode satu block per run, dan TF
+    untuk docID yang sama dijumlahkan.
+
+    Jika deleted (DeletionBitmap) diberikan, postings dan doc_length milik
+    dokumen yang dihapus dibuang (purge); term yang postings-nya habis
+    tidak ditulis.
+
+    Memori yang dipakai per term dibatasi oleh banyaknya run dikali ukuran
+    block (chunk_size, default merged_index.block_size), bukan oleh
+    panjang postings list. Index masukan dibaca berurutan, sehingga merge
+    didominasi I/O sequential.
+
+    Parameters
+    ----------
+    indices: List[InvertedIndexReader]
+        Intermediate index yang sudah dibuka, term terurut menaik
+    merged_index: InvertedIndexWriter
+        Index hasil merge yang sudah dibuka
+    deleted: DeletionBitmap atau None
+    """
+    block_size = merged_index.block_size
+    chunk_size = chunk_size or block_size
+    for index in indices:
+        index.advise_sequential()
+
+    doc_length = DocLengths.combine([index.doc_length for index in indices])
+    if deleted:
+        doc_length = doc_length.without(deleted.doc_ids())
+
+    term_streams = [zip(index.terms, itertools.repeat(i)) for i, index in enumerate(indices)]
+    for term, group in itertools.groupby(heapq.merge(*term_streams), key = lambda x: x[0]):
+        runs = sorted((PostingsRun(indices[i], term, deleted) for _, i in group), key = lambda run: run.first_doc)
+        # df minimum setelah posting dokumen yang dihapus dibuang
+        df = sum(run.df - run.deleted_count() for run in runs)
+        disjoint = all(prev.last_doc < run.first_doc for prev, run in zip(runs, runs[1:]))
+
+        if block_size is None or (disjoint and df <= block_size):
+            postings_list, tf_list = _merge_decoded(runs, disjoint)
+            if postings_list:
+                merged_index.append(term, postings_list, tf_list)
+        elif disjoint:
+            merged_index.append_blocks(term, _concat_blocks(runs, merged_index, chunk_size))
+        else:
+            chunks = _merge_chunks(runs, chunk_size)
+            first = next(chunks, None)
+            second = next(chunks, None)
+            if first is None:
+                continue
+            if second is None and len(first[0]) <= block_size:
+                merged_index.append(term, *first)
+            else:
+                # chunk bisa lebih panjang dari block_size (chunk_size >
+                # block_size); encode_blocks memecahnya menjadi beberapa block
+                # dan append_blocks menghitung posting di semua block-nya
+                head = [first] if second is None else [first, second]
+                merged_index.append_blocks(term, (merged_index.encode_blocks(*chunk)
+                                                  for chunk in itertools.chain(head, chunks)))
+
+    # doc_length hasil merge adalah jumlah doc_length semua index masukan
+    # (append_blocks tidak meng-update doc_length)
+    merged_index.doc_length = doc_length
+
+
+def _merge_decoded(runs, disjoint):
+    """Merge di memori; hanya untuk postings list kecil atau index tanpa block"""
+    if disjoint:
+        postings_list, tf_list = [], []
+        for run in runs:
+            for chunk in run.chunks(run.df):
+                postings, tfs = run.decode_chunk(chunk)
+                postings_list.extend(postings)
+                tf_list.extend(tfs)
+        return postings_list, tf_list
+    merged = sorted_merge_posts_and_tfs_multi([list(run.postings(run.df)) for run in runs])
+    return [doc_id for doc_id, _ in merged], [tf for _, tf in merged]
+
+
+def _concat_blocks(runs, merged_index, chunk_size):
+    """
+    Generator bytes block untuk run-run yang tidak tumpang tindih. Block
+    yang bisa dipakai ulang (encoding sama) disalin apa adanya; sisanya
+    di-decode dan digabung sampai chunk_size posting.
+    """
+    pending_postings, pending_tfs = [], []
+    for run in runs:
+        reusable = run.reader.postings_encoding is merged_index.postings_encoding
+        for chunk in run.chunks(chunk_size):
+            if chunk[0] is not None and reusable:
+                if pending_postings:
+                    yield merged_index.encode_blocks(pending_postings, pending_tfs)
+                    pending_postings, pending_tfs = [], []
+                yield chunk[0]
+                continue
+            postings, tfs = run.decode_chunk(chunk)
+            pending_postings.extend(postings)
+            pending_tfs.extend(tfs)
+            if len(pending_postings) >= chunk_size:
+                yield merged_index.encode_blocks(pending_postings[:chunk_size], pending_tfs[:chunk_size])
+                pending_postings, pending_tfs = pending_postings[chunk_size:], pending_tfs[chunk_size:]
+    if pending_postings:
+        yield merged_index.encode_blocks(pending_postings, pending_tfs)
+
+
+def _merge_chunks(runs, chunk_size):
+    """
+    Generator (postings_list, tf_list) dengan paling banyak chunk_size
+    posting, hasil heap merge semua run; TF untuk docID yang sama
+    dijumlahkan
+    """
+    merged = heapq.merge(*[run.postings(chunk_size) for run in runs], key = lambda x: x[0])
+    postings_list, tf_list = [], []
+    for doc_id, tf in merged:
+        if postings_list and postings_list[-1] == doc_id:
+            tf_list[-1] += tf
+            continue
+        if len(postings_list) >= chunk_size:
+            yield postings_list, tf_list
+            postings_list, tf_list = [], []
+        postings_list.append(doc_id)
+        tf_list.append(tf)
+    if postings_list:
+        yield postings_list, tf_list
+
+
+if __name__ == "__main__":
+
+    import os
+    import contextlib
+    # dijalankan sebagai module: python -m home.merge
+    from .index import InvertedIndexReader, InvertedIndexWriter
+    from .compression import VBEPostings
+
+    tmp_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'tmp')
+
+    # docID tidak tumpang tindih (block disalin apa adanya), dan tumpang
+    # tindih (heap merge, TF dijumlahkan)
+    for second_block in [[(1, [20, 21, 22, 25, 30, 31], [1, 2, 3, 4, 5, 6]), (2, [23], [7])],
+                         [(1, [3, 10, 21, 22, 40], [1, 2, 3, 4, 5]), (2, [23], [7])]]:
+        with InvertedIndexWriter('test_merge_0', VBEPostings, directory=tmp_dir, block_size=4) as index:
+            index.append(1, [2, 3, 4, 8, 10, 11], [2, 4, 2, 3, 30, 1])
+            index.append(3, [5], [1])
+        with InvertedIndexWriter('test_merge_1', VBEPostings, directory=tmp_dir, block_size=4) as index:
+            for term, postings_list, tf_list in second_block:
+                index.append(term, postings_list, tf_list)
+        with InvertedIndexWriter('test_merged', VBEPostings, directory=tmp_dir, block_size=4) as merged_index:
+            with contextlib.ExitStack() as stack:
+                indices = [stack.enter_context(InvertedIndexReader(index_id, VBEPostings, directory=tmp_dir))
+                           for index_id in ['test_merge_0', 'test_merge_1']]
+                merge_indices(indices, merged_index)
+
+        expected = {}
+        for term, postings_list, tf_list in [(1, [2, 3, 4, 8, 10, 11], [2, 4, 2, 3, 30, 1]), (3, [5], [1])] + second_block:
+            for doc_id, tf in zip(postings_list, tf_list):
+                expected.setdefault(term, {})
+                expected[term][doc_id] = expected[term].get(doc_id, 0) + tf
+        with InvertedIndexReader('test_merged', VBEPostings, directory=tmp_dir) as index:
+            assert [term for term, _, _ in index] == [1, 2, 3], "terms salah"
+            for term, postings in expected.items():
+                assert index.get_postings_list(term) == (sorted(postings), [postings[d] for d in sorted(postings)]), "merge salah"
+            doc_length = {}
+            for postings in expected.values():
+                for doc_id, tf in postings.items():
+                    doc_length[doc_id] = doc_length.get(doc_id, 0) + tf
+            assert dict(index.doc_length.items()) == doc_length, "doc_length salah"
+
+    # purge dokumen yang dihapus: block yang memuat dokumen terhapus
+    # disaring, term yang postings-nya habis tidak ditulis
+    from .deletions import DeletionBitmap
+    deleted = DeletionBitmap()
+    for doc_id in [3, 5, 21]:
+        deleted.add(doc_id)
+    with InvertedIndexWriter('test_merge_0', VBEPostings, directory=tmp_dir, block_size=2) as index:
+        index.append(1, [2, 3, 4, 8, 10, 11], [2, 4, 2, 3, 30, 1])
+        index.append(3, [5], [1])
+    with InvertedIndexWriter('test_merge_1', VBEPostings, directory=tmp_dir, block_size=2) as index:
+        index.append(1, [20, 21, 22], [1, 2, 3])
+    with InvertedIndexWriter('test_merged', VBEPostings, directory=tmp_dir, block_size=2) as merged_index:
+        with contextlib.ExitStack() as stack:
+            indices = [stack.enter_context(InvertedIndexReader(index_id, VBEPostings, directory=tmp_dir))
+                       for index_id in ['test_merge_0', 'test_merge_1']]
+            merge_indices(indices, merged_index, deleted = deleted)
+    with InvertedIndexReader('test_merged', VBEPostings, directory=tmp_dir) as index:
+        assert [term for term, _, _ in index] == [1], "purge terms salah"
+        assert index.get_postings_list(1) == ([2, 4, 8, 10, 11, 20, 22], [2, 2, 3, 30, 1, 1, 3]), "purge salah"
+        assert not any(doc_id in deleted for doc_id in index.doc_length), "purge doc_length salah"
+
+    # chunk_size > block_size: satu chunk heap merge dipecah menjadi beberapa block
+    with InvertedIndexWriter('test_merge_0', VBEPostings, directory=tmp_dir, block_size=2) as index:
+        index.append(1, [2, 4, 6], [1, 2, 3])
+    with InvertedIndexWriter('test_merge_1', VBEPostings, directory=tmp_dir, block_size=2) as index:
+        index.append(1, [3, 5], [4, 5])
+    with InvertedIndexWriter('test_merged', VBEPostings, directory=tmp_dir, block_size=2) as merged_index:
+        with contextlib.ExitStack() as stack:
+            indices = [stack.enter_context(InvertedIndexReader(index_id, VBEPostings, directory=tmp_dir))
+                       for index_id in ['test_merge_0', 'test_merge_1']]
+            merge_indices(indices, merged_index, chunk_size = 8)
+    with InvertedIndexReader('test_merged', VBEPostings, directory=tmp_dir) as index:
+        assert index.get_postings_list(1) == ([2, 3, 4, 5, 6], [1, 4, 2, 5, 3]), "chunk_size > block_size salah"
+
+    for index_id in ['test_merge_0', 'test_merge_1', 'test_merged']:
+        for ext in InvertedIndexReader.EXTENSIONS:
+            if os.path.exists(os.path.join(tmp_dir, index_id + ext)):
+                os.remove(os.path.join(tmp_dir, index_id + ext))
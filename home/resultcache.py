@@ -0,0 +1,125 @@
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+
+class ResultCache:
+    """
+    Cache hasil pencarian di depan pipeline ranking. Key dibuat dengan key
+    dari term query hasil analisis (BSBIIndex.process_corp), konfigurasi
+    ranking, dan versi index (BSBIIndex.index_version), sehingga query yang
+    hanya berbeda huruf besar, tanda baca, stopword, atau imbuhan memakai
+    entri yang sama, dan entri lama otomatis tidak terpakai lagi setelah
+    generation baru aktif atau dokumen ditambah/dihapus.
+
+    Entri disimpan di memori proses (LRU, maksimum max_entries, kedaluwarsa
+    setelah ttl detik) dan, jika backend diberikan, juga di cache Django
+    (misalnya memcached atau redis) yang dipakai bersama semua worker.
+
+    Parameters
+    ----------
+    max_entries: int
+    ttl: float atau None
+        Umur entri (detik); None berarti tidak kedaluwarsa
+    backend: str atau None
+        Alias cache Django (lihat settings.CACHES) untuk cache bersama
+    """
+    def __init__(self, max_entries = 1024, ttl = 300, backend = None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.backend_alias = backend
+        self.backend = None
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(terms, config, version):
+        """Key cache: term query hasil analisis, konfigurasi ranking, versi index"""
+        return repr((tuple(terms), config, version))
+
+    def shared(self):
+        """Cache Django untuk backend (di-resolve saat pertama dipakai), atau None"""
+        if self.backend is None and self.backend_alias is not None:
+            from django.core.cache import caches
+            self.backend = caches[self.backend_alias]
+        return self.backend
+
+    @staticmethod
+    def shared_key(key):
+        # key cache Django dibatasi panjang dan karakternya (memcached)
+        return 'search:' + hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+    def get(self, key):
+        """Nilai untuk key, atau None jika tidak ada atau sudah kedaluwarsa"""
+        now = time.monotonic()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and (entry[0] is None or entry[0] > now):
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self.entries[key]
+        value = None
+        if self.shared() is not None:
+            value = self.backend.get(self.shared_key(key))
+        with self.lock:
+            if value is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        self.put_local(key, value, now)
+        return value
+
+    def put_local(self, key, value, now):
+        with self.lock:
+            self.entries[key] = (None if self.ttl is None else now + self.ttl, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def set(self, key, value):
+        self.put_local(key, value, time.monotonic())
+        if self.shared() is not None:
+            self.backend.set(self.shared_key(key), value, self.ttl)
+
+    def clear(self):
+        """Mengosongkan cache lokal (backend bersama tidak diubah)"""
+        with self.lock:
+            self.entries.clear()
+
+    def stats(self):
+        with self.lock:
+            total = self.hits + self.misses
+            return {'hits': self.hits, 'misses': self.misses, 'entries': len(self.entries),
+                    'hit_rate': self.hits / total if total else 0.}
+
+
+if __name__ == "__main__":
+
+    cache = ResultCache(max_entries = 2, ttl = None)
+    key = ResultCache.key(['univers', 'indonesia'], ('k', 10), (1, 100, 0))
+    assert cache.get(key) is None, "cache kosong salah"
+    cache.set(key, ['1/10.txt'])
+    assert cache.get(key) == ['1/10.txt'], "get salah"
+    assert key != ResultCache.key(['univers', 'indonesia'], ('k', 10), (2, 100, 0)), "versi index harus masuk key"
+    cache.set('b', 1)
+    cache.get(key)
+    cache.set('c', 2)
+    assert cache.get('b') is None and cache.get(key) == ['1/10.txt'], "LRU salah"
+    assert cache.stats()['hits'] == 3 and cache.stats()['misses'] == 2 and cache.stats()['entries'] == 2, "stats salah"
+
+    expired = ResultCache(ttl = 0)
+    expired.set(key, [])
+    assert expired.get(key) is None and expired.stats()['entries'] == 0, "ttl salah"
+
+    class DictBackend(dict):
+        def set(self, key, value, timeout):
+            self[key] = value
+
+    worker_a, worker_b = ResultCache(backend = 'shared'), ResultCache(backend = 'shared')
+    worker_a.backend = worker_b.backend = DictBackend()
+    worker_a.set(key, ['1/10.txt'])
+    assert worker_b.get(key) == ['1/10.txt'] and worker_b.stats()['entries'] == 1, "backend bersama salah"
@@ -0,0 +1,131 @@
+import contextlib
+
+from .index import InvertedIndexReader, PostingsCursor
+from .doclengths import DocLengths
+
+class MultiSegmentReader:
+    """
+    Reader gabungan untuk main index dan delta segment hasil indexing
+    incremental (lihat BSBIIndex.index_incremental). Setiap segment adalah
+    inverted index biasa, dan rentang docID antar segment tidak tumpang
+    tindih serta menaik sesuai urutan segment, sehingga postings list
+    sebuah term cukup disambung.
+
+    Interface yang disediakan sama dengan yang dipakai query processing
+    dari InvertedIndexReader: postings_dict (hanya df yang bermakna),
+    get_postings_list, cursor, doc_length, dan avg_doc_length.
+    """
+    def __init__(self, index_names, postings_encoding, directory=''):
+        self.index_names = index_names
+        self.postings_encoding = postings_encoding
+        self.directory = directory
+
+    def __enter__(self):
+        with contextlib.ExitStack() as stack:
+            self.segments = [stack.enter_context(InvertedIndexReader(index_name, self.postings_encoding, self.directory))
+                             for index_name in self.index_names]
+            stack.pop_all()
+        self.postings_dict = MultiSegmentPostingsDict(self.segments)
+        self.doc_length = DocLengths.combine([segment.doc_length for segment in self.segments])
+        self.avg_doc_length = self.doc_length.avg_doc_length
+        return self
+
+    def __exit__(self, exception_type, exception_value, traceback):
+        for segment in self.segments:
+            segment.__exit__(exception_type, exception_value, traceback)
+
+    def get_postings_list(self, term):
+        """Sama dengan InvertedIndexReader.get_postings_list, untuk semua segment"""
+        postings_list, tf_list = [], []
+        for segment in self.segments:
+            if term in segment.postings_dict:
+                segment_postings, segment_tfs = segment.get_postings_list(term)
+                postings_list.extend(segment_postings)
+                tf_list.extend(segment_tfs)
+        if not postings_list:
+            raise KeyError(term)
+        return postings_list, tf_list
+
+    def cursor(self, term):
+        cursors = [segment.cursor(term) for segment in self.segments if term in segment.postings_dict]
+        if not cursors:
+            raise KeyError(term)
+        return ChainedCursor(cursors)
+
+
+class MultiSegmentPostingsDict:
+    """
+    View postings_dict untuk MultiSegmentReader: postings_dict[term] adalah
+    4-tuple dengan df = jumlah df di semua segment; posisi dan panjang
+    bytes tidak bermakna (None) karena postings tersebar di beberapa file.
+    """
+    def __init__(self, segments):
+        self.segments = segments
+
+    def __contains__(self, term):
+        return any(term in segment.postings_dict for segment in self.segments)
+
+    def __getitem__(self, term):
+        df = sum(segment.postings_dict[term][1] for segment in self.segments if term in segment.postings_dict)
+        if df == 0:
+            raise KeyError(term)
+        return (None, df, None, None)
+
+    def get(self, term, default = None):
+        return self[term] if term in self else default
+
+
+class ChainedCursor:
+    """
+    PostingsCursor untuk term yang postings list-nya tersebar di beberapa
+    segment: cursor per segment dipakai berurutan, dan next_geq melompati
+    segment yang docID terakhirnya lebih kecil dari target.
+    """
+    END = PostingsCursor.END
+
+    def __init__(self, cursors):
+        self.cursors = cursors
+        self.df = sum(cursor.df for cursor in cursors)
+        self.max_tf = max(cursor.max_tf for cursor in cursors)
+        self.index = 0
+        self.sync()
+
+    def sync(self):
+        while self.index < len(self.cursors) and self.cursors[self.index].doc == self.END:
+            self.index += 1
+        if self.index < len(self.cursors):
+            self.doc, self.tf = self.cursors[self.index].doc, self.cursors[self.index].tf
+        else:
+            self.doc, self.tf = self.END, 0
+
+    def segment_for(self, target):
+        """Index cursor (segment) yang akan memuat target"""
+        i = self.index
+        while i < len(self.cursors) - 1 and self.cursors[i].last_docs[-1] < target:
+            i += 1
+        return i
+
+    def next(self):
+        self.cursors[self.index].next()
+        self.sync()
+
+    def next_geq(self, target):
+        if self.doc >= target:
+            return
+        self.index = self.segment_for(target)
+        self.cursors[self.index].next_geq(target)
+        self.sync()
+
+    def block_max_tf(self, target = None):
+        if self.index >= len(self.cursors):
+            return 0
+        if target is None:
+            return self.cursors[self.index].block_max_tf()
+        return self.cursors[self.segment_for(target)].block_max_tf(target)
+
+    def block_last_doc(self, target = None):
+        if self.index >= len(self.cursors):
+            return self.END
+        if target is None:
+            return self.cursors[self.index].block_last_doc()
+        return self.cursors[self.segment_for(target)].block_last_doc(target)
@@ -0,0 +1,109 @@
+import sys
+from array import array
+from collections import Counter
+
+class SpimiBuilder:
+    """
+    Single-Pass In-Memory Indexing: postings dan TF setiap term ditambahkan
+    langsung ke array compact (array('I'), 4 byte per elemen) milik term
+    tersebut, tanpa mengumpulkan pasangan <termID, docID> terlebih dahulu.
+    Perkiraan memori yang dipakai dihitung setiap kali dokumen ditambahkan;
+    jika sudah mencapai memory_budget (lihat full), isi builder ditulis ke
+    sebuah intermediate index dengan flush lalu builder dikosongkan.
+
+    Dokumen harus ditambahkan dengan docID menaik, sehingga postings list
+    setiap term sudah terurut tanpa sorting. Sebuah dokumen tidak pernah
+    terpecah ke dua intermediate index (flush hanya terjadi antar dokumen).
+
+    Parameters
+    ----------
+    memory_budget: int
+        Batas (perkiraan) bytes postings di memori sebelum flush
+    """
+    # Perkiraan bytes per posting (docID dan TF) dan per term baru (entry
+    # dictionary dan dua objek array kosong); alokasi berlebih array tidak
+    # dihitung
+    POSTING_BYTES = 2 * array('I').itemsize
+    TERM_BYTES = 2 * sys.getsizeof(array('I')) + 100
+
+    def __init__(self, memory_budget = 64 << 20):
+        self.memory_budget = memory_budget
+        self.clear()
+
+    def clear(self):
+        self.postings = {}
+        self.tfs = {}
+        self.memory = 0
+        self.last_doc = -1
+
+    def __len__(self):
+        """Banyaknya term di builder"""
+        return len(self.postings)
+
+    def add_document(self, doc_id, term_ids):
+        """
+        Menambahkan sebuah dokumen.
+
+        Parameters
+        ----------
+        doc_id: int
+            Harus lebih besar dari docID dokumen sebelumnya
+        term_ids: Iterable[int]
+            termID setiap token di dokumen (boleh berulang; TF dihitung di sini)
+        """
+        if doc_id <= self.last_doc:
+            raise ValueError("docID harus ditambahkan secara menaik")
+        self.last_doc = doc_id
+        postings, tfs = self.postings, self.tfs
+        counts = Counter(term_ids)
+        for term_id, tf in counts.items():
+            postings_list = postings.get(term_id)
+            if postings_list is None:
+                postings_list = postings[term_id] = array('I')
+                tfs[term_id] = array('I')
+                self.memory += self.TERM_BYTES
+            postings_list.append(doc_id)
+            tfs[term_id].append(tf)
+        self.memory += self.POSTING_BYTES * len(counts)
+
+    def full(self):
+        return self.memory >= self.memory_budget
+
+    def flush(self, index):
+        """
+        Menulis semua postings (terurut berdasarkan termID) ke index
+        (InvertedIndexWriter yang sudah dibuka), lalu mengosongkan builder
+        """
+        for term_id in sorted(self.postings):
+            index.append(term_id, self.postings[term_id].tolist(), self.tfs[term_id].tolist())
+        self.clear()
+
+
+if __name__ == "__main__":
+
+    builder = SpimiBuilder(memory_budget = 10 * SpimiBuilder.TERM_BYTES)
+    builder.add_document(0, [3, 1, 3, 3])
+    builder.add_document(2, [1, 2])
+    assert builder.postings == {3: array('I', [0]), 1: array('I', [0, 2]), 2: array('I', [2])}, "postings salah"
+    assert builder.tfs == {3: array('I', [3]), 1: array('I', [1, 1]), 2: array('I', [1])}, "TF salah"
+    assert builder.memory == 3 * SpimiBuilder.TERM_BYTES + 4 * SpimiBuilder.POSTING_BYTES and not builder.full(), \
+        "perkiraan memori salah"
+    try:
+        builder.add_document(1, [1])
+        assert False, "docID tidak menaik harus ditolak"
+    except ValueError:
+        pass
+
+    class ListWriter:
+        def __init__(self):
+            self.appended = []
+        def append(self, term, postings_list, tf_list):
+            self.appended.append((term, postings_list, tf_list))
+
+    index = ListWriter()
+    builder.flush(index)
+    assert index.appended == [(1, [0, 2], [1, 1]), (2, [2], [1]), (3, [0], [3])], "flush salah"
+    assert len(builder) == 0 and builder.memory == 0, "clear salah"
+    for doc_id in range(10):
+        builder.add_document(doc_id, [doc_id])
+    assert builder.full(), "full salah"
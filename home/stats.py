@@ -0,0 +1,66 @@
+import os
+import json
+import math
+import numpy as np
+
+class TermStatistics:
+    """
+    Statistik per term yang dihitung sekali saat indexing (lihat
+    BSBIIndex.index()), sehingga query processing cukup melakukan table
+    lookup dan tidak perlu menghitung ulang log(N/df) atau max(tf) untuk
+    setiap posting.
+
+    Disimpan sebagai dua file di samping index:
+        <index_name>.termstats.npy  : structured array yang diindeks dengan
+                                      termID (di-load dengan mmap)
+        <index_name>.termstats.json : N, k1, dan b yang dipakai saat build
+
+    Kolom:
+        df         : document frequency
+        max_tf     : TF maksimum di postings list
+        idf        : log (N / df)                  (TF-IDF dan BM25)
+        idf_smooth : log (N / (1 + df)) + 1        (TF max-norm)
+        bm25_ub    : batas atas skor BM25 sebuah posting term ini, yaitu
+                     idf * (k1 + 1) * max_tf / (k1 * (1 - b) + max_tf)
+
+    Term yang tidak ada di index mempunyai df = 0.
+    """
+    DTYPE = np.dtype([('df', '<u4'), ('max_tf', '<u4'), ('idf', '<f8'),
+                      ('idf_smooth', '<f8'), ('bm25_ub', '<f8')])
+
+    def __init__(self, path):
+        self.path = path
+        with open(path + '.json') as f:
+            metadata = json.load(f)
+        self.n, self.k1, self.b = metadata['n'], metadata['k1'], metadata['b']
+        self.table = np.load(path + '.npy', mmap_mode='r')
+        self.df = self.table['df']
+        self.max_tf = self.table['max_tf']
+        self.idf = self.table['idf']
+        self.idf_smooth = self.table['idf_smooth']
+        self.bm25_ub = self.table['bm25_ub']
+
+    @staticmethod
+    def exists(path):
+        return os.path.exists(path + '.npy') and os.path.exists(path + '.json')
+
+    def __contains__(self, term_id):
+        return 0 <= term_id < len(self.table) and self.df[term_id] > 0
+
+    @classmethod
+    def build(cls, path, reader, n, k1 = 1.5, b = 0.7):
+        """
+        Menghitung statistik untuk semua term di reader (InvertedIndexReader
+        yang sudah dibuka) lalu menyimpannya ke path.
+        """
+        n_slots = max(reader.terms) + 1 if len(reader.terms) > 0 else 0
+        table = np.zeros(n_slots, dtype=cls.DTYPE)
+        reader.reset()
+        for term, _, tf_list in reader:
+            df, max_tf = len(tf_list), max(tf_list)
+            idf = math.log(n / df)
+            table[term] = (df, max_tf, idf, math.log(n / (1 + df)) + 1,
+                           idf * (k1 + 1) * max_tf / (k1 * (1 - b) + max_tf))
+        np.save(path + '.npy', table)
+        with open(path + '.json', 'w') as f:
+            json.dump({'n': n, 'k1': k1, 'b': b}, f)
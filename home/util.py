@@ -1,3 +1,97 @@
+import os
+import heapq
+import struct
+import numpy as np
+
+class CompactStrings:
+    """
+    Representasi read-only dari sekumpulan string (id_to_str dan
+    str_to_id sebuah IdMap) yang disimpan di file <name>.idmap. Semua
+    string disimpan sebagai satu blob UTF-8 dengan offsets array, sehingga
+    memuatnya hanya satu kali read tanpa membuat jutaan objek str; string
+    di-decode ketika diakses.
+
+    Layout file (little-endian):
+        header  : magic b'IDMP', version (uint32), n (uint64)
+        offsets : (n + 1) x uint64, string ke-i adalah blob[offsets[i]:offsets[i+1]]
+        order   : n x uint64, id terurut berdasarkan bytes UTF-8 string-nya
+                  lalu id (untuk lookup string -> id dengan binary search;
+                  string yang di-reassign memakai id terbesarnya)
+        blob    : semua string (UTF-8) disambung
+
+    Instance ini berperan sebagai id_to_str (indexing dengan id, len, iterasi)
+    sekaligus str_to_id (get, in, indexing dengan string).
+    """
+    MAGIC = b'IDMP'
+    VERSION = 1
+    HEADER = struct.Struct('<4sIQ')
+
+    def __init__(self, data):
+        magic, version, n = self.HEADER.unpack_from(data, 0)
+        if magic != self.MAGIC or version != self.VERSION:
+            raise ValueError("bukan file IdMap yang valid")
+        self.n = n
+        self.offsets = np.frombuffer(data, dtype='<u8', count=n + 1, offset=self.HEADER.size)
+        self.order = np.frombuffer(data, dtype='<u8', count=n, offset=self.HEADER.size + 8 * (n + 1))
+        self.blob = memoryview(data)[self.HEADER.size + 8 * (2 * n + 1):]
+
+    @classmethod
+    def write(cls, path, strings):
+        encoded = [string.encode('utf-8') for string in strings]
+        offsets = np.zeros(len(encoded) + 1, dtype='<u8')
+        np.cumsum([len(e) for e in encoded], out=offsets[1:])
+        order = np.array(sorted(range(len(encoded)), key=encoded.__getitem__), dtype='<u8')
+        # ditulis ke file sementara lalu di-rename, sehingga pembaca tidak
+        # pernah melihat file yang setengah ditulis
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(cls.HEADER.pack(cls.MAGIC, cls.VERSION, len(encoded)))
+            f.write(offsets.tobytes())
+            f.write(order.tobytes())
+            f.write(b"".join(encoded))
+        os.replace(tmp_path, path)
+
+    def bytes_at(self, i):
+        return self.blob[int(self.offsets[i]):int(self.offsets[i + 1])]
+
+    def __len__(self):
+        return self.n
+
+    def __getitem__(self, key):
+        if type(key) is str:
+            i = self.get(key)
+            if i is None:
+                raise KeyError(key)
+            return i
+        if key < 0:
+            key += self.n
+        if not 0 <= key < self.n:
+            raise IndexError(key)
+        return str(self.bytes_at(key), 'utf-8')
+
+    def __iter__(self):
+        return (self[i] for i in range(self.n))
+
+    def get(self, s, default = None):
+        """id (terbesar) dari string s (binary search terhadap order), atau default"""
+        if type(s) is not str:
+            return default
+        target = s.encode('utf-8')
+        lo, hi = 0, self.n
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.bytes_at(int(self.order[mid])).tobytes() <= target:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo > 0 and self.bytes_at(int(self.order[lo - 1])) == target:
+            return int(self.order[lo - 1])
+        return default
+
+    def __contains__(self, s):
+        return self.get(s) is not None
+
+
 class IdMap:
     """
     Ingat kembali di kuliah, bahwa secara praktis, sebuah dokumen dan
@@ -5,6 +99,11 @@ class IdMap:
     karena itu, kita perlu maintain mapping antara string term (atau
     dokumen) ke integer yang bersesuaian, dan sebaliknya. Kelas IdMap ini
     akan melakukan hal tersebut.
+
+    IdMap bisa disimpan dalam bentuk compact (lihat save, load, dan
+    CompactStrings). IdMap hasil load bersifat read-only sampai ada string
+    baru yang di-assign, dimana isinya di-thaw kembali menjadi dictionary
+    dan list.
     """
 
     def __init__(self):
@@ -27,6 +126,10 @@ class IdMap:
         """Mengembalikan banyaknya term (atau dokumen) yang disimpan di IdMap."""
         return len(self.id_to_str)
 
+    def __contains__(self, s):
+        """Apakah string s sudah mempunyai id (tanpa meng-assign id baru)"""
+        return s in self.str_to_id
+
     def __get_str(self, i):
         """Mengembalikan string yang terasosiasi dengan index i."""
         # TDO
@@ -39,12 +142,25 @@ class IdMap:
         integer id baru tersebut.
         """
         # TDO
-        if s in self.id_to_str:
-            return self.str_to_id[s]
-        else:
+        i = self.str_to_id.get(s)
+        if i is None:
+            self.thaw()
+            i = len(self.id_to_str)
             self.id_to_str.append(s)
-            self.str_to_id[s] = len(self.id_to_str) - 1
-        return self.str_to_id[s]
+            self.str_to_id[s] = i
+        return i
+
+    def reassign(self, s):
+        """
+        Meng-assign id baru untuk string s yang sudah ada (misalnya dokumen
+        yang di-update); id lama tetap memetakan ke s, tetapi s sekarang
+        memetakan ke id baru.
+        """
+        self.thaw()
+        i = len(self.id_to_str)
+        self.id_to_str.append(s)
+        self.str_to_id[s] = i
+        return i
 
     def __getitem__(self, key):
         """
@@ -67,6 +183,39 @@ class IdMap:
         else:
             raise TypeError
 
+    def get_ids(self, strings):
+        """List of id untuk setiap string (string baru di-assign id baru)"""
+        return [self.__get_id(s) for s in strings]
+
+    def get_strs(self, ids):
+        """List of string untuk setiap id"""
+        id_to_str = self.id_to_str
+        return [id_to_str[i] for i in ids]
+
+    def thaw(self):
+        """Mengubah IdMap hasil load (CompactStrings) menjadi dictionary dan list yang bisa diubah"""
+        if isinstance(self.id_to_str, CompactStrings):
+            self.id_to_str = list(self.id_to_str)
+            self.str_to_id = {s: i for i, s in enumerate(self.id_to_str)}
+
+    def save(self, path):
+        """Menyimpan IdMap dalam bentuk compact ke path (lihat CompactStrings)"""
+        CompactStrings.write(path, self.id_to_str)
+
+    @classmethod
+    def load(cls, path):
+        """Memuat IdMap yang disimpan dengan save"""
+        with open(path, 'rb') as f:
+            strings = CompactStrings(f.read())
+        id_map = cls()
+        id_map.id_to_str = strings
+        id_map.str_to_id = strings
+        return id_map
+
+# Di atas ukuran ini (total banyaknya tuple), merge untuk doc id integer
+# dilakukan dengan NumPy
+NUMPY_MERGE_THRESHOLD = 4096
+
 def sorted_merge_posts_and_tfs(posts_tfs1, posts_tfs2):
     """
     Menggabung (merge) dua lists of tuples (doc id, tf) dan mengembalikan
@@ -89,35 +238,79 @@ def sorted_merge_posts_and_tfs(posts_tfs1, posts_tfs2):
     -------
     List[(Comparablem, int)]
         Penggabungan yang sudah terurut
+
+    Kedua list ditelusuri sekali dengan two-pointer, O(n + m); untuk list
+    besar dengan doc id integer dipakai NumPy.
     """
     # TDO
-    pst_tf1_index = [x[0] for x in posts_tfs1]
-    pst_tf2_index = [x[0] for x in posts_tfs2]
-    concated = []
-    for data in posts_tfs1:
-        if data[0] in pst_tf2_index:
-            id = data[0]
-            tf2 = 0
-            for x in posts_tfs2:
-                if x[0] == id:
-                    tf2 = x[1]
-                    break
-            tf = data[1] + tf2
-            set_returned = (id, tf)
-            concated.append(set_returned)
+    if len(posts_tfs1) + len(posts_tfs2) >= NUMPY_MERGE_THRESHOLD and _is_int_postings(posts_tfs1, posts_tfs2):
+        return _numpy_merge_posts_and_tfs([posts_tfs1, posts_tfs2])
+
+    # two-pointer merge, O(n + m)
+    merged = []
+    i, j = 0, 0
+    while i < len(posts_tfs1) and j < len(posts_tfs2):
+        doc_id1, tf1 = posts_tfs1[i]
+        doc_id2, tf2 = posts_tfs2[j]
+        if doc_id1 == doc_id2:
+            merged.append((doc_id1, tf1 + tf2))
+            i += 1
+            j += 1
+        elif doc_id1 < doc_id2:
+            merged.append((doc_id1, tf1))
+            i += 1
+        else:
+            merged.append((doc_id2, tf2))
+            j += 1
+    merged.extend(posts_tfs1[i:])
+    merged.extend(posts_tfs2[j:])
+    return merged
+
+def sorted_merge_posts_and_tfs_multi(posts_tfs_lists):
+    """
+    Versi n-way dari sorted_merge_posts_and_tfs: menggabung sekaligus semua
+    sorted list of tuples (doc id, tf) milik sebuah term (misalnya dari
+    semua intermediate index), dengan TF diakumulasikan untuk doc id yang
+    sama. Dengan heap, kompleksitasnya O(N log k) untuk N tuple dari k list,
+    daripada menggabung berulang kali ke list hasil yang terus membesar.
+
+    contoh: [[(1, 2), (5, 1)], [(1, 3)], [(2, 4), (5, 5)]]
+            return [(1, 5), (2, 4), (5, 6)]
+
+    Parameters
+    ----------
+    posts_tfs_lists: List[List[(Comparable, int)]]
+
+    Returns
+    -------
+    List[(Comparable, int)]
+        Penggabungan yang sudah terurut
+    """
+    if sum(len(posts_tfs) for posts_tfs in posts_tfs_lists) >= NUMPY_MERGE_THRESHOLD \
+            and _is_int_postings(*posts_tfs_lists):
+        return _numpy_merge_posts_and_tfs(posts_tfs_lists)
+
+    merged = []
+    for doc_id, tf in heapq.merge(*posts_tfs_lists, key = lambda x: x[0]):
+        if merged and merged[-1][0] == doc_id:
+            merged[-1] = (doc_id, merged[-1][1] + tf)
         else:
-            id = data[0]
-            tf = data[1]
-            set_returned = (id, tf)
-            concated.append(set_returned)
-    for data in posts_tfs2:
-        if data[0] not in pst_tf1_index:
-            id = data[0]
-            tf = data[1]
-            set_returned = (id, tf)
-            concated.append(set_returned)
-    concated.sort(key = lambda x: x[0])
-    return concated
+            merged.append((doc_id, tf))
+    return merged
+
+def _is_int_postings(*posts_tfs_lists):
+    return all(type(posts_tfs[0][0]) is int for posts_tfs in posts_tfs_lists if posts_tfs)
+
+def _numpy_merge_posts_and_tfs(posts_tfs_lists):
+    """Merge dengan stable sort lalu penjumlahan TF per doc id (np.add.reduceat)"""
+    pairs = np.concatenate([np.asarray(posts_tfs, dtype=np.int64).reshape(-1, 2) for posts_tfs in posts_tfs_lists])
+    if len(pairs) == 0:
+        return []
+    pairs = pairs[np.argsort(pairs[:, 0], kind='stable')]
+    starts = np.flatnonzero(np.diff(pairs[:, 0], prepend=pairs[0, 0] - 1))
+    doc_ids = pairs[starts, 0]
+    tfs = np.add.reduceat(pairs[:, 1], starts)
+    return list(zip(doc_ids.tolist(), tfs.tolist()))
 
 def test(output, expected):
     """ simple function for testing """
@@ -140,3 +333,34 @@ if __name__ == '__main__':
     assert [doc_id_map[docname] for docname in docs] == [0, 1, 2], "docs_id salah"
     assert sorted_merge_posts_and_tfs([(1, 34), (3, 2), (4, 23)], \
                                       [(1, 11), (2, 4), (4, 3 ), (6, 13)]) == [(1, 45), (2, 4), (3, 2), (4, 26), (6, 13)], "sorted_merge_posts_and_tfs salah"
+    assert sorted_merge_posts_and_tfs([], [(1, 2)]) == [(1, 2)], "sorted_merge_posts_and_tfs salah"
+    assert sorted_merge_posts_and_tfs_multi([[(1, 2), (5, 1)], [(1, 3)], [(2, 4), (5, 5)]]) == [(1, 5), (2, 4), (5, 6)], \
+        "sorted_merge_posts_and_tfs_multi salah"
+    posts_tfs1 = [(i, i % 7 + 1) for i in range(0, 9000, 2)]
+    posts_tfs2 = [(i, i % 5 + 1) for i in range(0, 9000, 3)]
+    expected = {}
+    for doc_id, tf in posts_tfs1 + posts_tfs2:
+        expected[doc_id] = expected.get(doc_id, 0) + tf
+    assert sorted_merge_posts_and_tfs(posts_tfs1, posts_tfs2) == sorted(expected.items()), "sorted_merge_posts_and_tfs salah"
+    assert sorted_merge_posts_and_tfs_multi([posts_tfs1, [], posts_tfs2]) == sorted(expected.items()), \
+        "sorted_merge_posts_and_tfs_multi salah"
+
+    assert "halo" in term_id_map and "dunia" not in term_id_map, "__contains__ salah"
+    assert len(term_id_map) == 4, "__contains__ tidak boleh meng-assign id"
+    assert term_id_map.get_ids(["pagi", "halo", "dunia"]) == [3, 0, 4], "get_ids salah"
+    assert term_id_map.get_strs([4, 1]) == ["dunia", "semua"], "get_strs salah"
+
+    import tempfile
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, 'terms.idmap')
+        term_id_map[u"caf\u00e9"]
+        term_id_map.save(path)
+        loaded = IdMap.load(path)
+        assert len(loaded) == 6 and list(loaded.id_to_str) == term_id_map.id_to_str, "IdMap.load salah"
+        assert [loaded[term] for term in term_id_map.id_to_str] == list(range(6)), "IdMap.load salah"
+        assert loaded[5] == u"caf\u00e9" and "zzz" not in loaded and "" not in loaded, "IdMap.load salah"
+        assert loaded["baru"] == 6 and loaded["halo"] == 0 and "baru" in loaded, "thaw salah"
+        assert loaded.reassign("halo") == 7 and loaded["halo"] == 7 and loaded[0] == "halo", "reassign salah"
+        loaded.save(path)
+        reloaded = IdMap.load(path)
+        assert reloaded["halo"] == 7 and reloaded[0] == "halo" and reloaded["baru"] == 6, "reassign save/load salah"
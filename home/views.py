@@ -1,12 +1,11 @@
 from django.shortcuts import render
-from .models import eval_lambdamart
+from .models import eval_lambdamart, document_text
 from datetime import datetime
 import os
 import sys
 # Create your views here.
 
 def index(request):
-    directoire = os.path.dirname(__file__)
     query = request.GET.get('searchInput')
     if query == None or query == "":
         context = {
@@ -30,8 +29,7 @@ def index(request):
         else:
             resultat_text = {}
             for doc in resultat:
-                text_dir = os.path.join(directoire, "collection/") + doc
-                text = open(text_dir).read()
+                text = document_text(doc)
                 coll_ids = int((doc).split("/")[0])
                 ids = int((doc).split("/")[1].split(".")[0])
                 resultat_text[str(doc)] = [text, coll_ids, ids]
@@ -44,10 +42,8 @@ def index(request):
             return render(request, 'home/index.html', context)
 
 def clicked(request, coll_ids, ids):
-    directoire = os.path.dirname(__file__)
     data_ids = f"{str(coll_ids)}/{str(ids)}.txt"
-    text_dir = os.path.join(directoire, "collection/") + data_ids
-    returned = open(text_dir).read()
+    returned = document_text(data_ids)
 
     context = {
         'name': f"Document {str(ids)}",
@@ -89,6 +89,11 @@ DATABASES = {
 if PRODUCTION:
     DATABASES['default'] = dj_database_url.config()
 
+# Cache hasil pencarian (home.resultcache.ResultCache): alias di CACHES yang
+# dipakai bersama semua worker, atau None untuk cache di memori setiap worker
+
+SEARCH_RESULT_CACHE = os.environ.get('SEARCH_RESULT_CACHE')
+
 # Password validation
 # https://docs.djangoproject.com/en/4.1/ref/settings/#auth-password-validators
 
@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'scaramouche.settings')
 
 application = get_wsgi_application()
+
+# Muat searcher sekali per worker, sebelum request pertama datang; lewat
+# home.models agar dibuat dengan cache hasil dari settings
+from home.models import engine
+engine()